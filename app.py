@@ -1,12 +1,14 @@
 import streamlit as st
-import pandas as pd
 import os
+import atexit
+import threading
 from dotenv import load_dotenv
 
 # Import our backend modules
 from src.agent import get_agent, validate_response
-from src.db import init_db, log_interaction
-from src.utils import setup_logging
+from src.db import DB_PATH, init_db, attach_db, has_employees_table, log_interaction, QueryLogWriter
+from src.utils import setup_logging, read_processed
+from src.ingest import ingest_upload
 
 # --- 1. Configuration & Setup ---
 load_dotenv()
@@ -66,31 +68,52 @@ st.markdown("""
 @st.cache_resource
 def initialize_system():
     """
-    Loads the cleaned dataset and initializes the in-memory SQLite database.
+    Connects the agent to the SQLite database.
     This runs only once to improve performance.
+    If the ETL already bulk-loaded hr.db it is attached directly; otherwise the cleaned
+    dataset is loaded (Parquet preferred over the CSV export) and the database is built from it.
     """
-    csv_path = "data/processed/cleaned_employees.csv"
-    
-    if not os.path.exists(csv_path):
-        return None, None
-    
     try:
+        if has_employees_table(DB_PATH):
+            return attach_db(DB_PATH)
+
+        candidates = ["data/processed/cleaned_employees.parquet", "data/processed/cleaned_employees.csv"]
+        data_path = next((path for path in candidates if os.path.exists(path)), None)
+        if data_path is None:
+            return None
+
         # Load Data
-        df = pd.read_csv(csv_path)
+        df = read_processed(data_path)
         # Init Database (src/db.py)
-        db_instance = init_db(df)
-        return df, db_instance
+        return init_db(df)
     except Exception as e:
         st.error(f"Failed to load data: {e}")
-        return None, None
+        return None
 
-df, db = initialize_system()
+db = initialize_system()
+
+@st.cache_resource
+def upload_lock():
+    """
+    Process-wide lock so only one session rebuilds the dataset at a time.
+    """
+    return threading.Lock()
 
 # Stop if data is missing
-if df is None:
-    st.error("🚨 System Error: 'data/processed/cleaned_employees.csv' not found. Please run 'python -m src.etl' to generate it.")
+if db is None:
+    st.error("🚨 System Error: no processed data found in 'data/processed/'. Please run 'python -m src.etl' to generate it.")
     st.stop()
 
+@st.cache_resource
+def query_log_writer():
+    """
+    Process-wide background writer for query_logs, flushed when the server exits.
+    """
+    writer = QueryLogWriter(db)
+    writer.start()
+    atexit.register(writer.close)
+    return writer
+
 # --- 4. Session State Management ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -109,6 +132,27 @@ if "agent" not in st.session_state:
 st.title("🛡️ HR Intelligence Agent")
 st.caption("Double-Check Architecture: SQL Agent + QA Critic")
 
+# --- 5.1 UI: Upload a fresh extract ---
+with st.expander("📤 Upload a new HR extract"):
+    uploaded = st.file_uploader("Employees extract", type=["csv", "gz", "zst"],
+                                help="Raw employees.csv (optionally .csv.gz / .csv.zst). Replaces the current data.")
+    if uploaded is not None and st.button("Process & load", type="primary"):
+        lock = upload_lock()
+        # Another session's upload must not stall this one, so do not wait for the lock
+        if not lock.acquire(blocking=False):
+            st.warning("Another upload is being processed. Please try again shortly.")
+        else:
+            try:
+                progress_bar = st.progress(0.0, text="Processing extract...")
+                rows = ingest_upload(uploaded, uploaded.name, "data/processed/cleaned_employees.parquet", DB_PATH,
+                                     progress=lambda done: progress_bar.progress(min(done, 1.0), text="Processing extract..."))
+                progress_bar.progress(1.0, text="Done")
+                st.success(f"Loaded {rows:,} employees. New questions use the uploaded data.")
+            except Exception as e:
+                st.error(f"Upload failed, the previous data is unchanged: {e}")
+            finally:
+                lock.release()
+
 # Welcome Message for new session
 if not st.session_state.messages:
     st.info("👋 I am your verified HR assistant. I double-check every answer for accuracy.", icon="ℹ️")
@@ -168,7 +212,7 @@ if prompt := st.chat_input("Ask a question (e.g., 'Who has the highest salary?')
                     v_status = validation_result
 
                 # Log Interaction for Training/Audit
-                log_interaction(db, prompt, output_text, v_status)
+                log_interaction(db, prompt, output_text, v_status, writer=query_log_writer())
                 
                 # Update Session History
                 st.session_state.messages.append({
@@ -0,0 +1,548 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from src.duplicates import find_duplicate_clusters
+from src.etl import run_pipeline, transform_chunk
+from src.metrics import PipelineMetrics
+from src.utils import (format_phone_number, format_phone_series, clean_salary, clean_salary_series,
+                       standardize_dates, read_processed)
+
+FIRST_NAMES = ['Alice', 'Bob', 'Charlie', 'David', 'Eva', 'Frank', 'Grace', 'Heidi']
+LAST_NAMES = ['Brown', 'Davis', 'Garcia', 'Johnson', 'Jones', 'Miller', 'Smith', 'Williams']
+DEPARTMENTS = ['Admin', 'Cloud Tech', 'DevOps', 'Finance', 'HR', 'Sales']
+REGIONS = ['California', 'Florida', 'Illinois', 'Nevada', 'New York', 'Texas']
+STATUSES = ['Active', 'Inactive', 'Pending']
+PERFORMANCE_SCORES = ['Average', 'Excellent', 'Good', 'Poor']
+AGES = [25, 30, 35, 40]
+
+# Read p99 the WAL runs of the concurrency benchmark must stay under
+MAX_READ_P99_MS = 500.0
+
+# Questions users ask the agent, as the SQL it typically generates for them
+AGENT_QUERIES = {
+    'count in Sales': "SELECT COUNT(*) FROM employees WHERE Department = 'Sales'",
+    'avg salary per department': "SELECT Department, AVG(Salary) FROM employees GROUP BY Department",
+    'top 10 salaries': "SELECT First_Name, Last_Name, Salary FROM employees ORDER BY Salary DESC LIMIT 10",
+    'highest salary in Sales': "SELECT First_Name, Last_Name, Salary FROM employees "
+                               "WHERE Department = 'Sales' ORDER BY Salary DESC LIMIT 5",
+    'joined before 2021': "SELECT COUNT(*) FROM employees WHERE Join_Date < '2021-01-01'",
+    'active in Texas': "SELECT COUNT(*) FROM employees WHERE Status = 'Active' AND Region = 'Texas'",
+    'excellent in DevOps': "SELECT First_Name, Last_Name FROM employees "
+                           "WHERE Performance_Score = 'Excellent' AND Department = 'DevOps'",
+    'inactive hires of 2023': "SELECT COUNT(*) FROM employees WHERE Status = 'Inactive' "
+                              "AND Join_Date BETWEEN '2023-01-01' AND '2023-12-31'",
+    'salary band counts': "SELECT salary_band, COUNT(*) FROM employees GROUP BY salary_band",
+}
+
+
+def synthetic_phones(n_rows: int, seed: int = 42) -> pd.Series:
+    """
+    Builds a dirty phone column resembling the raw HR extract:
+    signed integers, punctuated strings, short numbers and missing values.
+    """
+    rng = np.random.default_rng(seed)
+    numbers = rng.integers(1_000_000_000, 9_999_999_999, size=n_rows)
+    styles = rng.integers(0, 5, size=n_rows)
+
+    values = np.empty(n_rows, dtype=object)
+    values[styles == 0] = (-numbers[styles == 0]).astype(str)
+    values[styles == 1] = [f"({n // 10**7}) {n // 10**4 % 1000}-{n % 10**4:04d}" for n in numbers[styles == 1]]
+    values[styles == 2] = [f"{n // 10**7}.{n // 10**4 % 1000}.{n % 10**4:04d}" for n in numbers[styles == 2]]
+    values[styles == 3] = (numbers[styles == 3] // 1000).astype(str)
+    values[styles == 4] = None
+    return pd.Series(values, name="Phone")
+
+
+def synthetic_salaries(n_rows: int, seed: int = 42) -> pd.Series:
+    """
+    Builds a salary column mixing plain decimals, currency-formatted strings and gaps.
+    """
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(40_000, 150_000, size=n_rows).round(2)
+    styles = rng.integers(0, 4, size=n_rows)
+
+    values = amounts.astype(str).astype(object)
+    values[styles == 1] = [f"${a:,.2f}" for a in amounts[styles == 1]]
+    values[styles == 2] = "N/A"
+    values[styles == 3] = None
+    return pd.Series(values, name="Salary")
+
+
+def synthetic_join_dates(n_rows: int, seed: int = 42) -> pd.Series:
+    """
+    Builds a Join_Date column in the raw M/D/YYYY layout with a share of ISO dates and gaps.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, size=n_rows), unit="D")
+    us_dates = pd.Series(days.month.astype(str) + "/" + days.day.astype(str) + "/" + days.year.astype(str), dtype=object)
+    styles = rng.integers(0, 10, size=n_rows)
+    us_dates[styles == 0] = days[styles == 0].strftime("%Y-%m-%d")
+    us_dates[styles == 1] = None
+    return us_dates.rename("Join_Date")
+
+
+def synthetic_employees(n_rows: int, start_id: int = 0, duplicate_rate: float = 0.05, seed: int = 42) -> pd.DataFrame:
+    """
+    Builds a block of raw employee rows with the employees.csv schema.
+    duplicate_rate of the rows reuse an earlier email from the block with different
+    casing/whitespace, exercising the normalized-email dedup.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(start_id, start_id + n_rows)
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), n_rows)]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), n_rows)]
+
+    emails = pd.Series(first, dtype=object).str.lower() + "." + pd.Series(last, dtype=object).str.lower() \
+        + pd.Series(ids.astype(str), dtype=object) + "@example.com"
+    duplicates = np.flatnonzero(rng.random(n_rows) < duplicate_rate)
+    duplicates = duplicates[duplicates > 0]
+    sources = (rng.random(len(duplicates)) * duplicates).astype(int)
+    emails.iloc[duplicates] = " " + emails.iloc[sources].str.upper().values
+
+    ages = np.array(AGES, dtype=object)[rng.integers(0, len(AGES), n_rows)]
+    ages[rng.random(n_rows) < 0.2] = None
+
+    return pd.DataFrame({
+        'Employee_ID': "EMP" + pd.Series(ids.astype(str), dtype=object),
+        'First_Name': first,
+        'Last_Name': last,
+        'Age': ages,
+        'Department_Region': np.array([f"{d}-{r}" for d in DEPARTMENTS for r in REGIONS], dtype=object)[
+            rng.integers(0, len(DEPARTMENTS) * len(REGIONS), n_rows)],
+        'Status': np.array(STATUSES, dtype=object)[rng.integers(0, len(STATUSES), n_rows)],
+        'Join_Date': synthetic_join_dates(n_rows, seed).values,
+        'Salary': synthetic_salaries(n_rows, seed).values,
+        'Email': emails.values,
+        'Phone': synthetic_phones(n_rows, seed).values,
+        'Performance_Score': np.array(PERFORMANCE_SCORES, dtype=object)[rng.integers(0, len(PERFORMANCE_SCORES), n_rows)],
+        'Remote_Work': np.where(rng.random(n_rows) < 0.5, 'TRUE', 'FALSE'),
+    })
+
+
+def generate_employees_csv(path: str, n_rows: int, duplicate_rate: float = 0.05, block_size: int = 1_000_000):
+    """
+    Writes a synthetic employees.csv of n_rows, generated block by block to bound memory.
+    """
+    with open(path, 'w', newline='') as f:
+        for block_no, start in enumerate(range(0, n_rows, block_size)):
+            block = synthetic_employees(min(block_size, n_rows - start), start_id=start,
+                                        duplicate_rate=duplicate_rate, seed=block_no)
+            block.to_csv(f, index=False, header=(start == 0))
+
+
+def check_phone_parity(phones: pd.Series) -> bool:
+    """
+    Compares the vectorized formatter against the reference per-row implementation.
+    """
+    expected = phones.apply(format_phone_number)
+    actual = format_phone_series(phones)
+    mismatches = (expected.fillna("<None>") != actual.fillna("<None>")).sum()
+    return mismatches == 0
+
+
+def bench_phones(n_rows: int):
+    print(f"\n>>> PHONE NORMALIZATION ({n_rows:,} rows)...")
+    phones = synthetic_phones(n_rows)
+
+    if check_phone_parity(phones.head(100_000)) and check_phone_parity(pd.Series([-1651623197, 1234567890, None, 12345])):
+        print("✅ Parity Pass: vectorized output matches format_phone_number.")
+    else:
+        print("❌ Parity Fail: vectorized output differs from format_phone_number.")
+        exit(1)
+
+    start = time.perf_counter()
+    phones.apply(format_phone_number)
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    format_phone_series(phones)
+    vectorized = time.perf_counter() - start
+
+    print(f"Per-row apply:  {per_row:.2f}s")
+    print(f"Vectorized:     {vectorized:.2f}s")
+    print(f"Speedup:        {per_row / vectorized:.1f}x")
+
+
+def bench_salaries(n_rows: int):
+    print(f"\n>>> SALARY CLEANING ({n_rows:,} rows)...")
+    salaries = synthetic_salaries(n_rows)
+
+    expected = salaries.head(100_000).apply(clean_salary).astype('Int64')
+    if expected.equals(clean_salary_series(salaries.head(100_000))):
+        print("✅ Parity Pass: vectorized output matches clean_salary.")
+    else:
+        print("❌ Parity Fail: vectorized output differs from clean_salary.")
+        exit(1)
+
+    start = time.perf_counter()
+    salaries.apply(clean_salary).astype('Int64')
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clean_salary_series(salaries)
+    vectorized = time.perf_counter() - start
+
+    print(f"Per-row apply:  {per_row:.2f}s")
+    print(f"Vectorized:     {vectorized:.2f}s")
+    print(f"Speedup:        {per_row / vectorized:.1f}x")
+
+
+def bench_dates(n_rows: int):
+    print(f"\n>>> JOIN_DATE STANDARDIZATION ({n_rows:,} rows)...")
+    dates = synthetic_join_dates(n_rows)
+
+    # Compare on the single-format part, which is what the old inference path can handle
+    us_only = dates[dates.str.contains("/", na=False)].head(100_000)
+    expected = pd.to_datetime(us_only, errors="coerce").dt.strftime("%Y-%m-%d")
+    if expected.equals(standardize_dates(us_only)[0]):
+        print("✅ Parity Pass: format detection matches pd.to_datetime output.")
+    else:
+        print("❌ Parity Fail: format detection differs from pd.to_datetime output.")
+        exit(1)
+
+    start = time.perf_counter()
+    inferred = pd.to_datetime(dates, errors="coerce").dt.strftime("%Y-%m-%d")
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    detected, format_counts = standardize_dates(dates)
+    vectorized = time.perf_counter() - start
+
+    print(f"Formats used:   {format_counts}")
+    print(f"Inferred parse: {per_row:.2f}s ({inferred.isna().sum():,} rows lost)")
+    print(f"Detected parse: {vectorized:.2f}s ({detected.isna().sum():,} rows lost)")
+    print(f"Speedup:        {per_row / vectorized:.1f}x")
+
+
+def bench_duplicates(sizes: list, planted: int = 1000):
+    """
+    Times the blocked fuzzy duplicate stage at growing sizes. Each extract gets `planted`
+    copies of existing employees under new emails; the recall on them and the rows flagged
+    that are neither a copy nor its original (false positives) are reported.
+    """
+    print("\n>>> FUZZY DUPLICATE CANDIDATES...")
+    for n_rows in sizes:
+        cleaned = transform_chunk(synthetic_employees(n_rows, duplicate_rate=0))
+        copies = cleaned.sample(planted, random_state=0)
+        copies = copies.assign(Employee_ID=copies['Employee_ID'] + "-R", Email="rehire." + copies['Email'])
+        cleaned = pd.concat([cleaned, copies], ignore_index=True)
+
+        start = time.perf_counter()
+        report = find_duplicate_clusters(cleaned)
+        elapsed = time.perf_counter() - start
+
+        found = copies['Employee_ID'].isin(report['Employee_ID']).sum()
+        planted_ids = pd.concat([copies['Employee_ID'], copies['Employee_ID'].str[:-len("-R")]])
+        false_positives = (~report['Employee_ID'].isin(planted_ids)).sum()
+        print(f"{n_rows:>12,} rows  {elapsed:>7.2f}s  {n_rows / elapsed:>12,.0f} rows/s  "
+              f"{found}/{planted} planted copies clustered, {false_positives:,} other rows flagged")
+
+
+def _time_query(conn: sqlite3.Connection, sql: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def bench_indexes(n_rows: int, repeats: int = 5):
+    """
+    Times AGENT_QUERIES on an employees table of n_rows loaded by the ETL bulk loader,
+    with the EMPLOYEE_INDEXES and ANALYZE statistics vs. a copy without them.
+    """
+    from src.db import EMPLOYEE_INDEXES, EmployeeBulkLoader
+    print(f"\n>>> EMPLOYEE INDEXES ({n_rows:,} rows)...")
+    cleaned = transform_chunk(synthetic_employees(n_rows, duplicate_rate=0))
+    with tempfile.TemporaryDirectory() as work_dir:
+        indexed_path = os.path.join(work_dir, "hr.db")
+        start = time.perf_counter()
+        with EmployeeBulkLoader(indexed_path) as loader:
+            loader.write(cleaned)
+        print(f"Load with indexes + ANALYZE: {time.perf_counter() - start:.2f}s")
+
+        plain_path = os.path.join(work_dir, "plain.db")
+        shutil.copyfile(os.path.realpath(indexed_path), plain_path)
+        with sqlite3.connect(plain_path) as conn:
+            for name in EMPLOYEE_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS idx_employees_{name}")
+            conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+
+        indexed, plain = sqlite3.connect(indexed_path), sqlite3.connect(plain_path)
+        print(f"{'query':<28}{'no index':>10}{'indexed':>10}{'speedup':>9}  plan")
+        for label, sql in AGENT_QUERIES.items():
+            before, after = _time_query(plain, sql, repeats), _time_query(indexed, sql, repeats)
+            plan = "; ".join(row[3] for row in indexed.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            print(f"{label:<28}{before * 1000:>8.1f}ms{after * 1000:>8.1f}ms{before / after:>8.1f}x  {plan}")
+        indexed.close()
+        plain.close()
+
+
+def _read_under_log_writes(engine, readers: int, seconds: float, response_kb: int,
+                           background_writer: bool = False) -> dict:
+    """
+    Runs `readers` threads issuing AGENT_QUERIES while one thread logs interactions
+    back to back (directly or through a QueryLogWriter); returns read latency percentiles,
+    read errors, log calls done and their latency as seen by the caller.
+    """
+    from sqlalchemy import text
+    from langchain_community.utilities import SQLDatabase
+    from src.db import QueryLogWriter, log_interaction
+    db = SQLDatabase(engine, ignore_tables=['agent_queries'])
+    writer = QueryLogWriter(db) if background_writer else None
+    stop = threading.Event()
+    latencies, errors, writes, log_latencies = [], [], [0], []
+    queries = list(AGENT_QUERIES.values())
+
+    def read(offset):
+        i = offset
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text(queries[i % len(queries)])).fetchall()
+            except Exception as e:
+                errors.append(repr(e))
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    def write():
+        response = "x" * (response_kb * 1024)
+        while not stop.is_set():
+            start = time.perf_counter()
+            log_interaction(db, "How many employees are in Sales?", response, "VERIFIED_CORRECT", writer=writer)
+            log_latencies.append(time.perf_counter() - start)
+            writes[0] += 1
+            if writer is not None:
+                # A chat turn takes seconds; without a pause this thread would only measure queue drops
+                time.sleep(0.001)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)] + [threading.Thread(target=write)]
+    if writer is not None:
+        writer.start()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if writer is not None:
+        writer.close()
+    engine.dispose()
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {'reads': len(latencies), 'p50_ms': p50, 'p99_ms': p99, 'max_ms': max(latencies) * 1000,
+            'read_errors': len(errors), 'writes': writes[0],
+            'log_p99_ms': np.percentile(log_latencies, 99) * 1000, 'dropped': writer.dropped if writer else 0}
+
+
+def bench_concurrency(n_rows: int, readers: int = 4, seconds: float = 10.0, response_kb: int = 64,
+                      max_p99_ms: float = MAX_READ_P99_MS):
+    """
+    Agent reads racing query-log writes, with the WAL connection profile vs. a default
+    rollback-journal engine on the same data. Exits with status 1 if any read failed
+    or a WAL run's read p99 exceeded max_p99_ms.
+    """
+    from sqlalchemy import create_engine
+    from src.db import EmployeeBulkLoader, create_snapshot_engine
+    print(f"\n>>> READS UNDER LOG WRITES ({n_rows:,} rows, {readers} readers, {seconds:.0f}s)...")
+    cleaned = transform_chunk(synthetic_employees(n_rows, duplicate_rate=0))
+    with tempfile.TemporaryDirectory() as work_dir:
+        wal_path = os.path.join(work_dir, "hr.db")
+        with EmployeeBulkLoader(wal_path) as loader:
+            loader.write(cleaned)
+        journal_path = os.path.join(work_dir, "journal.db")
+        shutil.copyfile(os.path.realpath(wal_path), journal_path)
+        with sqlite3.connect(journal_path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+
+        runs = {
+            'rollback journal': (create_engine(f"sqlite:///{journal_path}"), False),
+            'WAL profile': (create_snapshot_engine(wal_path), False),
+            'WAL + log writer': (create_snapshot_engine(wal_path), True),
+        }
+        print(f"{'mode':<18}{'reads':>8}{'p50':>9}{'p99':>9}{'max':>10}{'errors':>8}"
+              f"{'log calls':>11}{'log p99':>10}{'dropped':>9}")
+        results = {}
+        for mode, (engine, background_writer) in runs.items():
+            result = results[mode] = _read_under_log_writes(engine, readers, seconds, response_kb, background_writer)
+            print(f"{mode:<18}{result['reads']:>8,}{result['p50_ms']:>7.1f}ms{result['p99_ms']:>7.1f}ms"
+                  f"{result['max_ms']:>8.1f}ms{result['read_errors']:>8}{result['writes']:>11,}"
+                  f"{result['log_p99_ms']:>8.2f}ms{result['dropped']:>9,}")
+
+    failed = [f"{mode}: {result['read_errors']} read errors" for mode, result in results.items() if result['read_errors']]
+    failed += [f"{mode}: read p99 {result['p99_ms']:.1f}ms over {max_p99_ms:.0f}ms" for mode, result in results.items()
+               if mode.startswith('WAL') and result['p99_ms'] > max_p99_ms]
+    if failed:
+        print(f"❌ Concurrency Fail: {'; '.join(failed)}.")
+        exit(1)
+    print(f"✅ Concurrency Pass: no read errors, WAL read p99 under {max_p99_ms:.0f}ms.")
+
+
+def bench_modes(n_rows: int, chunk_size: int = 10_000):
+    """
+    Runs the pipeline on one synthetic extract in each execution mode, loading the database
+    where the mode is used with it, and checks every output matches the in-memory run.
+    """
+    print(f"\n>>> PIPELINE MODES ({n_rows:,} rows, chunks of {chunk_size:,})...")
+    modes = {
+        'streaming': {'chunk_size': chunk_size},
+        'pipelined + db': {'chunk_size': chunk_size, 'pipelined': True, 'db': True},
+        'workers + pipelined': {'chunk_size': chunk_size, 'workers': 2, 'pipelined': True},
+        'checkpoint + db': {'chunk_size': chunk_size, 'checkpoint': True, 'db': True},
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "employees.csv")
+        generate_employees_csv(input_path, n_rows)
+        run_pipeline(input_path, os.path.join(work_dir, "reference.parquet"))
+        reference = read_processed(os.path.join(work_dir, "reference.parquet"))
+
+        failed = []
+        for mode, options in modes.items():
+            output_path = os.path.join(work_dir, f"{mode.replace(' + ', '_')}.parquet")
+            db_path = os.path.join(work_dir, "hr.db") if options.pop('db', False) else None
+            start = time.perf_counter()
+            try:
+                run_pipeline(input_path, output_path, db_path=db_path, **options)
+            except Exception as e:
+                print(f"{mode:<22} failed: {e!r}")
+                failed.append(mode)
+                continue
+            elapsed = time.perf_counter() - start
+            matches = read_processed(output_path).equals(reference)
+            if db_path:
+                with sqlite3.connect(db_path) as conn:
+                    matches &= conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0] == len(reference)
+            print(f"{mode:<22}{elapsed:>8.2f}s  {'matches' if matches else 'DIFFERS from'} in-memory output")
+            if not matches:
+                failed.append(mode)
+
+    if failed:
+        print(f"❌ Parity Fail: {', '.join(failed)}.")
+        exit(1)
+    print("✅ Parity Pass: every mode matches the in-memory output.")
+
+
+def _profile_pipeline(input_path: str, output_path: str, results_queue):
+    """
+    Runs run_pipeline with stage metrics in a fresh process, so the reported
+    peak RSS belongs to this run alone.
+    """
+    metrics = PipelineMetrics()
+    run_pipeline(input_path, output_path, metrics=metrics)
+    stages = metrics.stages
+    for stage in stages:
+        stage['rows_per_sec'] = round(stage['rows_in'] / stage['wall_seconds']) if stage['wall_seconds'] and stage['rows_in'] else None
+    results_queue.put({'stages': stages, 'rows_in': stages[0]['rows_in'],
+                       'rows_out': next(s['rows_out'] for s in stages if s['stage'] == 'dedup'),
+                       'peak_rss_mb': metrics.to_dict()['peak_rss_mb']})
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return 'unknown'
+
+
+def bench_pipeline(sizes: list, results_path: str, duplicate_rate: float, output_format: str):
+    """
+    Generates a synthetic extract per size, profiles run_pipeline on it and appends one
+    JSON line per run to results_path for comparison across commits.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    commit = _git_commit()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_rows in sizes:
+            print(f"\n>>> PIPELINE ({n_rows:,} rows)...")
+            input_path = os.path.join(work_dir, f"employees_{n_rows}.csv")
+            generate_employees_csv(input_path, n_rows, duplicate_rate)
+
+            results_queue = ctx.Queue()
+            proc = ctx.Process(target=_profile_pipeline,
+                               args=(input_path, os.path.join(work_dir, f"cleaned.{output_format}"), results_queue))
+            start = time.perf_counter()
+            proc.start()
+            result = results_queue.get()
+            proc.join()
+            total = time.perf_counter() - start
+
+            for stage in result['stages']:
+                print(f"{stage['stage']:<10} {stage['wall_seconds']:>8.2f}s  {stage['rows_per_sec'] or 0:>12,} rows/s")
+            print(f"Total:     {total:.2f}s, peak RSS {result['peak_rss_mb']:.0f} MB")
+
+            record = {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'commit': commit,
+                'rows': n_rows,
+                'input_mb': round(os.path.getsize(input_path) / 2**20, 1),
+                'duplicate_rate': duplicate_rate,
+                'output_format': output_format,
+                'total_seconds': round(total, 3),
+                **result,
+            }
+            with open(results_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            os.remove(input_path)
+
+    print(f"\nResults appended to {results_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the ETL pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    columns_parser = subparsers.add_parser("columns", help="Per-row vs vectorized cleaning steps.")
+    columns_parser.add_argument("--rows", type=int, default=10_000_000, help="Synthetic column size.")
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="End-to-end stage timings on synthetic extracts.")
+    pipeline_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000],
+                                 help="Row counts of the synthetic employees.csv files.")
+    pipeline_parser.add_argument("--duplicate-rate", type=float, default=0.05,
+                                 help="Share of rows reusing an earlier email.")
+    pipeline_parser.add_argument("--format", choices=["parquet", "csv"], default="parquet",
+                                 help="Processed output format.")
+    pipeline_parser.add_argument("--results", default="bench_results.jsonl",
+                                 help="JSON-lines file the run records are appended to.")
+    modes_parser = subparsers.add_parser("modes", help="Parity of the streaming, pipelined and DB-loading modes.")
+    modes_parser.add_argument("--rows", type=int, default=100_000, help="Rows in the synthetic extract.")
+    modes_parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per chunk in the streaming modes.")
+    duplicates_parser = subparsers.add_parser("duplicates", help="Scaling of the fuzzy duplicate stage.")
+    duplicates_parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 4_000_000],
+                                   help="Row counts of the synthetic cleaned extracts.")
+    indexes_parser = subparsers.add_parser("indexes", help="Agent query latency with and without the employee indexes.")
+    indexes_parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the employees table.")
+    indexes_parser.add_argument("--repeats", type=int, default=5, help="Runs per query (median reported).")
+    concurrency_parser = subparsers.add_parser("concurrency", help="Agent reads racing query-log writes.")
+    concurrency_parser.add_argument("--rows", type=int, default=200_000, help="Rows in the employees table.")
+    concurrency_parser.add_argument("--readers", type=int, default=4, help="Concurrent reader threads.")
+    concurrency_parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each run.")
+    concurrency_parser.add_argument("--max-p99-ms", type=float, default=MAX_READ_P99_MS,
+                                    help="Fail when a WAL run's read p99 exceeds this many milliseconds.")
+    args = parser.parse_args()
+
+    if args.command == "columns":
+        bench_phones(args.rows)
+        bench_salaries(args.rows)
+        bench_dates(args.rows)
+    elif args.command == "modes":
+        bench_modes(args.rows, args.chunk_size)
+    elif args.command == "duplicates":
+        bench_duplicates(args.sizes)
+    elif args.command == "indexes":
+        bench_indexes(args.rows, args.repeats)
+    elif args.command == "concurrency":
+        bench_concurrency(args.rows, args.readers, args.seconds, max_p99_ms=args.max_p99_ms)
+    else:
+        bench_pipeline(args.sizes, args.results, args.duplicate_rate, args.format)
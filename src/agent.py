@@ -32,6 +32,32 @@ def _get_llm() -> ChatVertexAI:
              raise ValueError(f"Model '{model_name}' not found. Check permissions or model name.")
         raise e
 
+def _derived_columns_guide(db: SQLDatabase) -> str:
+    """
+    Prompt section advertising the ETL's precomputed (indexed) columns, when the loaded
+    employees table has them, along with the as-of date tenure_days is anchored to.
+    """
+    from sqlalchemy import inspect, text
+    try:
+        columns = {col['name'] for col in inspect(db._engine).get_columns('employees')}
+        if not {'join_year', 'tenure_days', 'salary_band'} <= columns:
+            return ""
+        with db._engine.connect() as connection:
+            row = connection.execute(text("SELECT value FROM etl_metadata WHERE key = 'as_of_date'")).fetchone()
+    except Exception as e:
+        logger.warning(f"Could not read derived column metadata: {e}")
+        return ""
+
+    as_of = row[0] if row else "the last ETL run"
+    return f"""
+    6. **Precomputed Columns** (indexed, prefer them over date/number arithmetic):
+       - `join_year` (INTEGER): year of Join_Date. "Joined before 2021" -> `join_year < 2021`.
+       - `tenure_days` (INTEGER): days employed as of {as_of}; NULL for future join dates.
+         Use it for tenure ranking/filters ("most tenured" -> `ORDER BY tenure_days DESC`).
+         For tenure as of the Current Date, add the days between {as_of} and the Current Date.
+       - `salary_band` (TEXT): one of '<50k', '50k-75k', '75k-100k', '100k-150k', '150k+'.
+    """
+
 def get_agent(db: SQLDatabase):
     """
     Constructs the SQL Agent Executor.
@@ -50,7 +76,7 @@ def get_agent(db: SQLDatabase):
     3. **Dates**: Sanity check dates. Ignore future dates for tenure. 'Current Date' is {today_str}.
     4. **Data Integrity**: If a field is NULL or invalid, exclude it or treat as 0, but note it.
     5. **Out of Scope**: If asked about data not in the schema (e.g. 'office location'), state it is not available.
-    
+    {_derived_columns_guide(db)}
     Structure your answer as:
     | Col1 | Col2 | ... |
     |---|---|---|
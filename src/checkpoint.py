@@ -0,0 +1,110 @@
+import os
+import json
+import shutil
+from typing import Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.utils import setup_logging
+
+logger = setup_logging()
+
+def _fsync_replace(tmp_path: str, path: str):
+    """
+    Makes a fully written temp file durable, then atomically moves it into place.
+    """
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    dir_fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+class ChunkCheckpoint:
+    """
+    Durable record of the chunks a streaming run has finished, kept in <output>.checkpoint/.
+
+    Every completed chunk's cleaned rows are stored as a Parquet part (dtypes preserved)
+    and state.json lists the parts together with the position (input file index, chunk
+    number within that file) of the last completed chunk. Parts and state are fsynced and
+    atomically renamed, so after a crash the directory always describes a consistent prefix
+    of the run. A checkpoint is only reused when the input files (path, size, mtime) and the
+    chunk size match, and the as-of date too when one is requested; otherwise the run starts
+    from scratch. A resumed run adopts the recorded as_of so tenure stays consistent.
+    """
+
+    VERSION = 3
+
+    def __init__(self, output_path: str, input_files: list, chunk_size: int, as_of: Optional[str] = None):
+        self.directory = f"{output_path}.checkpoint"
+        self.chunk_size = chunk_size
+        self.as_of = as_of
+        self.inputs = []
+        for path in input_files:
+            stat = os.stat(path)
+            self.inputs.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+        self.parts = []
+        self.position = None
+        # pandas dtypes of the cleaned chunks; Parquet reads e.g. object text columns back as str
+        self.dtypes = None
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.directory, "state.json")
+
+    def load(self) -> bool:
+        """
+        Picks up a compatible checkpoint left by an earlier run. Returns True when resuming.
+        """
+        if os.path.exists(self._state_path):
+            with open(self._state_path) as f:
+                state = json.load(f)
+            if (state.get('version') == self.VERSION and state.get('chunk_size') == self.chunk_size
+                    and state.get('inputs') == self.inputs and self.as_of in (None, state.get('as_of'))):
+                self.as_of = state.get('as_of')
+                self.parts = state['parts']
+                self.dtypes = state['dtypes']
+                self.position = tuple(state['position']) if state['position'] else None
+                logger.info(f"Resuming from checkpoint: {len(self.parts)} parts, last chunk {self.position}.")
+                return True
+            logger.warning("Checkpoint does not match the current input, chunk size or as-of date. Starting over.")
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+        return False
+
+    def is_done(self, file_index: int, chunk_no: int) -> bool:
+        return self.position is not None and (file_index, chunk_no) <= self.position
+
+    def commit(self, file_index: int, chunk_no: int, cleaned: Optional[pd.DataFrame]):
+        """
+        Durably records a finished chunk. cleaned is None when dedup removed every row.
+        Chunks must be committed in input order.
+        """
+        if cleaned is not None and len(cleaned):
+            if self.dtypes is None:
+                self.dtypes = {col: str(dtype) for col, dtype in cleaned.dtypes.items()}
+            name = f"part-{len(self.parts):06d}.parquet"
+            part_path = os.path.join(self.directory, name)
+            pq.write_table(pa.Table.from_pandas(cleaned, preserve_index=False), f"{part_path}.tmp")
+            _fsync_replace(f"{part_path}.tmp", part_path)
+            self.parts.append(name)
+
+        self.position = (file_index, chunk_no)
+        with open(f"{self._state_path}.tmp", 'w') as f:
+            json.dump({'version': self.VERSION, 'chunk_size': self.chunk_size, 'inputs': self.inputs, 'as_of': self.as_of,
+                       'parts': self.parts, 'dtypes': self.dtypes, 'position': list(self.position)}, f)
+        _fsync_replace(f"{self._state_path}.tmp", self._state_path)
+
+    def read_parts(self, columns: Optional[list] = None):
+        """
+        Yields the stored cleaned chunks in input order, with the dtypes they were committed with.
+        """
+        for name in self.parts:
+            part = pq.read_table(os.path.join(self.directory, name), columns=columns).to_pandas()
+            yield part.astype({col: dtype for col, dtype in self.dtypes.items()
+                               if col in part.columns and str(part[col].dtype) != dtype})
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,47 +1,650 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DisconnectionError
 from langchain_community.utilities import SQLDatabase
 import pandas as pd
+import zstandard
 import logging
+import os
+import time
+import atexit
+import queue
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+DB_PATH = "data/processed/hr.db"
+
+QUERY_LOGS_DDL = """
+    CREATE TABLE IF NOT EXISTS query_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        user_query TEXT,
+        agent_response TEXT,
+        verification_status TEXT
+    )
+"""
+
+# Every statement the agent runs, with its EXPLAIN QUERY PLAN, for the index advisor
+AGENT_QUERIES_DDL = """
+    CREATE TABLE IF NOT EXISTS agent_queries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        sql TEXT,
+        query_plan TEXT,
+        duration_ms REAL,
+        error TEXT
+    )
+"""
+
+# Name prefix of indexes created by the index advisor; they are recreated in every new snapshot
+ADVISED_INDEX_PREFIX = 'idx_advised_'
+
+# Explicit column types for the employees table, in ETL output order
+EMPLOYEES_COLUMNS = {
+    'Employee_ID': 'TEXT',
+    'First_Name': 'TEXT',
+    'Last_Name': 'TEXT',
+    'Age': 'INTEGER',
+    'Status': 'TEXT',
+    'Join_Date': 'TEXT',
+    'Salary': 'INTEGER',
+    'Email': 'TEXT',
+    'Phone': 'TEXT',
+    'Performance_Score': 'TEXT',
+    'Remote_Work': 'BOOLEAN',
+    'Department': 'TEXT',
+    'Region': 'TEXT',
+    'join_year': 'INTEGER',
+    'tenure_days': 'INTEGER',
+    'salary_band': 'TEXT',
+}
+
+# Index set of the employees table, matched to the queries the agent generates: filters on
+# department/region/status/performance, date ranges, top-N and per-department salary stats.
+# A composite index also serves filters on its leading column, so those get no single index.
+EMPLOYEE_INDEXES = {
+    'department_salary': ['Department', 'Salary'],
+    'department_status': ['Department', 'Status'],
+    'region_department': ['Region', 'Department'],
+    'region_status': ['Region', 'Status'],
+    'status_join_date': ['Status', 'Join_Date'],
+    'join_date': ['Join_Date'],
+    'salary': ['Salary'],
+    'performance_score_department': ['Performance_Score', 'Department'],
+    'join_year': ['join_year'],
+    'tenure_days': ['tenure_days'],
+    'salary_band': ['salary_band'],
+}
+
+# Rows sampled per index by ANALYZE; plenty for the planner and keeps it fast at millions of rows
+ANALYZE_ROW_LIMIT = 1000
+
+# Run-level facts about the loaded dataset (e.g. as_of_date anchoring tenure_days)
+ETL_METADATA_DDL = """
+    CREATE TABLE IF NOT EXISTS etl_metadata (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+"""
+
+# Lets upserts match incoming rows on the normalized email without scanning the table
+EMAIL_KEY_INDEX_DDL = 'CREATE INDEX IF NOT EXISTS idx_employees_email_key ON employees (lower(trim("Email")))'
+EMPLOYEE_ID_INDEX_DDL = 'CREATE INDEX IF NOT EXISTS idx_employees_employee_id ON employees ("Employee_ID")'
+
+# Files applied by the ingestion daemon; written in the same transaction as their rows
+INGESTED_FILES_DDL = """
+    CREATE TABLE IF NOT EXISTS ingested_files (
+        path TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        rows_in INTEGER,
+        rows_upserted INTEGER,
+        ingested_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (path, sha256)
+    )
+"""
+
+# Connection profile of the served database. WAL lets agent reads proceed while query logs
+# are written (readers and the single writer never block each other); NORMAL sync is safe
+# with WAL (a power loss can only drop the last commits); mmap and a larger page cache keep
+# the employees table in memory across queries; busy_timeout queues concurrent writers.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 2**20,
+    'cache_size': -64_000,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5_000,
+}
+
+# Pooled connections per engine. Each Streamlit session thread checks one out per query, so
+# this bounds concurrent queries; connections are never shared by two threads at once.
+DEFAULT_POOL_SIZE = 8
+DEFAULT_POOL_OVERFLOW = 8
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Applies SQLITE_PRAGMAS to a new connection (journal_mode is persistent, the rest per connection).
+    """
+    for pragma, value in SQLITE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma}={value}")
+    return conn
+
+def connect(db_path: str = DB_PATH, **kwargs) -> sqlite3.Connection:
+    """
+    sqlite3 connection to the served database with the SQLITE_PRAGMAS profile.
+    """
+    return configure_connection(sqlite3.connect(db_path, **kwargs))
+
+# Bounded queue of the background query log writer; when full, new entries are dropped
+LOG_QUEUE_SIZE = 1000
+# Entries per write transaction, and the longest an entry waits for its batch to fill
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL = 1.0
+# A drop warning is logged for the first dropped entry and then every this many
+LOG_DROP_REPORT_EVERY = 100
+
+# Responses of at least this many UTF-8 bytes are stored in query_logs as zstd-compressed BLOBs
+LOG_COMPRESS_MIN_BYTES = 4096
+LOG_COMPRESS_LEVEL = 9
+
+def compress_response(text: Optional[str]):
+    """
+    agent_response as stored in query_logs: the text itself, or a compressed BLOB when large.
+    """
+    if text is None:
+        return None
+    data = text.encode('utf-8')
+    if len(data) < LOG_COMPRESS_MIN_BYTES:
+        return text
+    return zstandard.ZstdCompressor(level=LOG_COMPRESS_LEVEL).compress(data)
+
+def decompress_response(value) -> Optional[str]:
+    """
+    Text of a stored agent_response, whichever way compress_response stored it.
+    """
+    if isinstance(value, (bytes, memoryview)):
+        return zstandard.ZstdDecompressor().decompress(bytes(value)).decode('utf-8')
+    return value
+
+# Tables that live alongside employees but are not rebuilt by a load; copied into every new snapshot
+CARRY_OVER_TABLES = {'query_logs': QUERY_LOGS_DDL, 'agent_queries': AGENT_QUERIES_DDL}
+
+# After a swap, rows written to the retired snapshot by writers that were already blocked on it
+# are copied over once this many seconds have passed
+SWAP_GRACE_SECONDS = 1.0
+
+def _snapshot_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "snapshots")
+
+def new_snapshot_path(db_path: str = DB_PATH) -> str:
+    """
+    Fresh, never reused file name for building the next version of the database.
+    """
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    os.makedirs(_snapshot_dir(db_path), exist_ok=True)
+    return os.path.join(_snapshot_dir(db_path), f"{stem}-{stamp}-{os.getpid()}.db")
+
+def current_snapshot(db_path: str = DB_PATH) -> str:
+    """
+    File currently published under db_path (db_path itself before the first swap).
+    """
+    return os.path.realpath(db_path)
+
+def _fsync_path(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _has_sequence(conn: sqlite3.Connection, schema: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'sqlite_sequence'").fetchone() is not None
+
+def _carry_over(snapshot_path: str, live_path: Optional[str]) -> dict:
+    """
+    Copies CARRY_OVER_TABLES (schema, rows and AUTOINCREMENT counter) from the live database
+    into the new snapshot. The counter is carried too, so ids of rows already archived out of
+    query_logs are never handed out again. Returns the highest id copied per table, for the
+    post-swap sweep.
+    """
+    conn = sqlite3.connect(snapshot_path, isolation_level=None)
+    copied = {}
+    try:
+        if live_path:
+            conn.execute("ATTACH DATABASE ? AS live", (live_path,))
+        conn.execute("BEGIN")
+        for table, ddl in CARRY_OVER_TABLES.items():
+            row = None
+            if live_path:
+                row = conn.execute("SELECT sql FROM live.sqlite_master WHERE type = 'table' AND name = ?",
+                                   (table,)).fetchone()
+            conn.execute(f"DROP TABLE IF EXISTS main.{table}")
+            conn.execute(row[0] if row else ddl)
+            if row:
+                conn.execute(f"INSERT INTO main.{table} SELECT * FROM live.{table}")
+            copied[table] = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM main.{table}").fetchone()[0]
+            if row and _has_sequence(conn, "live") and _has_sequence(conn, "main"):
+                seq = conn.execute("SELECT seq FROM live.sqlite_sequence WHERE name = ?", (table,)).fetchone()
+                if seq and seq[0] > copied[table]:
+                    conn.execute("DELETE FROM main.sqlite_sequence WHERE name = ?", (table,))
+                    conn.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table, seq[0]))
+        conn.execute("COMMIT")
+        # Built without a journal; served with the profile's (persistent) journal mode
+        conn.execute(f"PRAGMA main.journal_mode={SQLITE_PRAGMAS['journal_mode']}")
+    finally:
+        conn.close()
+    return copied
+
+def _copy_advised_indexes(snapshot_path: str, live_path: str):
+    """
+    Recreates the advisor's indexes of the live database in the new snapshot, where their
+    columns still exist. Runs before the writer lock is taken, as building them takes a while.
+    """
+    conn = sqlite3.connect(snapshot_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS live", (live_path,))
+        rows = conn.execute("SELECT name, sql FROM live.sqlite_master WHERE type = 'index' AND name LIKE ?",
+                            (f"{ADVISED_INDEX_PREFIX}%",)).fetchall()
+        conn.execute("DETACH DATABASE live")
+        for name, ddl in rows:
+            try:
+                conn.execute(ddl)
+                conn.execute(f"PRAGMA analysis_limit={ANALYZE_ROW_LIMIT}")
+                conn.execute(f'ANALYZE "{name}"')
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Dropped advised index {name} from the new snapshot: {e}")
+        conn.commit()
+    finally:
+        conn.close()
+
+def _sweep_retired(retired: sqlite3.Connection, db_path: str, copied: dict):
+    """
+    Moves rows that reached the retired snapshot after the carry-over into the live one.
+    """
+    live = connect(db_path)
+    try:
+        for table, max_id in copied.items():
+            columns = [row[1] for row in retired.execute(f'PRAGMA table_info("{table}")') if row[1] != 'id']
+            if not columns:
+                continue
+            rows = retired.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id",
+                                   (max_id,)).fetchall()
+            if rows:
+                live.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                                 rows)
+                logger.info(f"Moved {len(rows)} late {table} rows from the retired snapshot.")
+        live.commit()
+    finally:
+        live.close()
+
+def _prune_snapshots(db_path: str, oldest_kept: str):
+    """
+    Deletes snapshots (and their journal files) older than oldest_kept. Names sort by build
+    time, so snapshots still being built by a later loader are never touched. The snapshot
+    currently published under db_path is always kept, even when an overlapping loader
+    published it out of name order.
+    """
+    snapshot_dir = _snapshot_dir(db_path)
+    kept = [os.path.basename(oldest_kept), os.path.basename(current_snapshot(db_path))]
+    for name in os.listdir(snapshot_dir):
+        if name < min(kept) and not any(name.startswith(stem) for stem in kept):
+            os.remove(os.path.join(snapshot_dir, name))
+
+def publish_snapshot(snapshot_path: str, db_path: str = DB_PATH, grace_seconds: float = SWAP_GRACE_SECONDS):
+    """
+    Atomically makes a fully built snapshot the database served under db_path.
+
+    db_path is a symlink into snapshots/, so the platform and filesystem must support
+    symlinks (os.symlink fails e.g. on Windows without Developer Mode, or on FAT/exFAT
+    volumes). Swapping the link with rename() is atomic, so every new connection opens
+    either the old or the new snapshot, never a partial one. SQLite resolves the link, so
+    each snapshot keeps its own journal/WAL files. Sessions already reading the old
+    snapshot finish undisturbed; engines from create_snapshot_engine move to the new one
+    on their next checkout. A legacy regular file at db_path is retired the same way on
+    the first swap.
+
+    CARRY_OVER_TABLES are copied from the live database while its writers are held off
+    (a RESERVED lock, which does not block readers), and rows a blocked writer still puts
+    into the retired snapshot are swept over after grace_seconds. Older snapshots are
+    deleted; the retired one is kept until the next swap. Indexes applied by the index
+    advisor are rebuilt in the new snapshot.
+    """
+    retired = None
+    if os.path.exists(db_path):
+        _copy_advised_indexes(snapshot_path, db_path)
+        retired = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+        retired.execute("BEGIN IMMEDIATE")
+    retired_path = current_snapshot(db_path) if retired else None
+    try:
+        copied = _carry_over(snapshot_path, db_path if retired else None)
+        _fsync_path(snapshot_path)
+        link_target = os.path.relpath(snapshot_path, os.path.dirname(os.path.abspath(db_path)))
+        swap_link = f"{db_path}.swap-{os.getpid()}"
+        os.symlink(link_target, swap_link)
+        os.replace(swap_link, db_path)
+        _fsync_path(os.path.dirname(os.path.abspath(db_path)))
+    finally:
+        if retired is not None:
+            retired.execute("ROLLBACK")
+    logger.info(f"Published database snapshot {snapshot_path} as {db_path}.")
+
+    oldest_kept = snapshot_path
+    if retired is not None:
+        try:
+            time.sleep(grace_seconds)
+            _sweep_retired(retired, db_path, copied)
+        finally:
+            retired.close()
+        if os.path.dirname(retired_path) == os.path.realpath(_snapshot_dir(db_path)):
+            # Overlapping loaders can publish out of name order; keep both sides of this swap
+            oldest_kept = min(snapshot_path, retired_path, key=os.path.basename)
+    _prune_snapshots(db_path, oldest_kept)
+
+def connection_snapshot(conn: sqlite3.Connection) -> str:
+    """
+    File a sqlite3 connection actually has open, to compare with current_snapshot().
+    """
+    return os.path.realpath(conn.execute("PRAGMA database_list").fetchone()[2])
+
+def create_snapshot_engine(db_path: str = DB_PATH, pool_size: int = DEFAULT_POOL_SIZE,
+                           max_overflow: int = DEFAULT_POOL_OVERFLOW):
+    """
+    SQLAlchemy engine for db_path that follows snapshot swaps: pooled connections opened on
+    a snapshot that is no longer published are discarded at checkout and reopened.
+    Connections get the SQLITE_PRAGMAS profile and are pooled (QueuePool): a thread holds
+    its own connection for the duration of a query or log write, then returns it.
+    """
+    engine = create_engine(f"sqlite:///{db_path}", pool_size=pool_size, max_overflow=max_overflow,
+                           connect_args={'check_same_thread': False})
+
+    @event.listens_for(engine, "connect")
+    def _remember_snapshot(dbapi_connection, connection_record):
+        configure_connection(dbapi_connection)
+        connection_record.info['snapshot'] = current_snapshot(db_path)
+
+    @event.listens_for(engine, "checkout")
+    def _follow_swaps(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info.get('snapshot') != current_snapshot(db_path):
+            raise DisconnectionError("Database snapshot was swapped.")
+
+    return engine
+
+def _sql_values(df: pd.DataFrame, columns: list):
+    """
+    Row tuples of native Python values; sqlite3 cannot bind pd.NA or numpy scalars.
+    Converted column-wise, which is much faster than iterating rows.
+    """
+    values = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in columns]
+    return zip(*values)
+
+def _create_employees_table(conn: sqlite3.Connection, columns: list):
+    column_defs = ", ".join(f'"{col}" {EMPLOYEES_COLUMNS.get(col, "TEXT")}' for col in columns)
+    conn.execute(f"CREATE TABLE employees ({column_defs})")
+
+def create_employee_indexes(conn, columns: list, analyze: bool = True):
+    """
+    Creates the EMPLOYEE_INDEXES whose columns exist, then refreshes planner statistics
+    with ANALYZE. conn may be a sqlite3 or a SQLAlchemy connection.
+    """
+    execute = conn.exec_driver_sql if hasattr(conn, 'exec_driver_sql') else conn.execute
+    for name, index_columns in EMPLOYEE_INDEXES.items():
+        if all(col in columns for col in index_columns):
+            quoted = ", ".join(f'"{col}"' for col in index_columns)
+            execute(f'CREATE INDEX IF NOT EXISTS idx_employees_{name} ON employees ({quoted})')
+    if analyze:
+        execute(f"PRAGMA analysis_limit={ANALYZE_ROW_LIMIT}")
+        execute("ANALYZE")
+
+def write_etl_metadata(conn: sqlite3.Connection, metadata: dict):
+    conn.execute(ETL_METADATA_DDL)
+    conn.executemany("INSERT OR REPLACE INTO etl_metadata (key, value) VALUES (?, ?)",
+                     [(key, str(value)) for key, value in metadata.items()])
+
+class EmployeeBulkLoader:
+    """
+    ETL sink that writes cleaned frames into the employees table of a new database snapshot.
+    The table is created with an explicit schema and every batch is inserted with
+    executemany inside a single transaction; bulk-load pragmas trade durability for
+    speed, which is safe because the snapshot is private until it is complete. On success
+    it is fsynced and hot-swapped in with publish_snapshot (query_logs carried over); on
+    failure it is deleted and the served database is untouched.
+    The EMPLOYEE_INDEXES and planner statistics are built after the rows are in, and
+    metadata is written to etl_metadata in the same transaction.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, batch_size: int = 50_000, metadata: Optional[dict] = None):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.metadata = metadata or {}
+        self.rows_written = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._columns: Optional[list] = None
+        self._snapshot_path: Optional[str] = None
+
+    def __enter__(self):
+        self._snapshot_path = new_snapshot_path(self.db_path)
+        # The pipelined ETL writes from its writer thread and closes from the caller's;
+        # the calls never overlap, so the connection may change threads
+        self._conn = sqlite3.connect(self._snapshot_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("PRAGMA cache_size=-200000")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("BEGIN")
+        return self
+
+    def _create_table(self, columns: list):
+        _create_employees_table(self._conn, columns)
+        self._columns = columns
+
+    def write(self, df: pd.DataFrame):
+        if self._columns is None:
+            self._create_table(list(df.columns))
+
+        placeholders = ", ".join("?" for _ in self._columns)
+        insert_sql = f"INSERT INTO employees VALUES ({placeholders})"
+
+        for start in range(0, len(df), self.batch_size):
+            batch = df.iloc[start:start + self.batch_size]
+            self._conn.executemany(insert_sql, _sql_values(batch, self._columns))
+        self.rows_written += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if self._columns is None:
+                    self._create_table(list(EMPLOYEES_COLUMNS))
+                # Building indexes once over the loaded table is cheaper than maintaining them per insert
+                create_employee_indexes(self._conn, self._columns)
+                write_etl_metadata(self._conn, self.metadata)
+                self._conn.execute("COMMIT")
+                self._conn.close()
+                publish_snapshot(self._snapshot_path, self.db_path)
+                logger.info(f"Bulk-loaded {self.rows_written} employee records into {self.db_path}.")
+        finally:
+            self._conn.close()
+            if exc_type is not None or not os.path.exists(self.db_path) \
+                    or current_snapshot(self.db_path) != os.path.realpath(self._snapshot_path):
+                # Never published: discard the partial snapshot
+                if os.path.exists(self._snapshot_path):
+                    os.remove(self._snapshot_path)
+        return False
+
+def upsert_employees(conn: sqlite3.Connection, df: pd.DataFrame, email_keys: pd.Series) -> int:
+    """
+    Merges a cleaned micro-batch into the employees table, keyed on Employee_ID: existing
+    rows with the same ID are replaced, new IDs are appended. A row whose normalized email
+    (email_keys) already belongs to a different employee is skipped, matching the
+    first-occurrence-wins dedup of the ETL. Creates the table if it does not exist yet.
+    Runs inside the caller's transaction; returns the number of rows upserted.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees'").fetchone()
+    if not exists:
+        _create_employees_table(conn, list(df.columns))
+    table_columns = [row[1] for row in conn.execute('PRAGMA table_info("employees")')]
+    columns = [col for col in table_columns if col in df.columns]
+    conn.execute(EMPLOYEE_ID_INDEX_DDL)
+    conn.execute(EMAIL_KEY_INDEX_DDL)
+    # Statistics from the full load stay representative for micro-batches
+    create_employee_indexes(conn, table_columns, analyze=not exists)
+
+    quoted = ", ".join(f'"{col}"' for col in columns)
+    conn.execute("DROP TABLE IF EXISTS temp.employee_batch")
+    conn.execute(f"CREATE TEMP TABLE employee_batch ({quoted}, email_key TEXT)")
+    conn.executemany(f"INSERT INTO temp.employee_batch VALUES ({', '.join('?' for _ in range(len(columns) + 1))})",
+                     _sql_values(df.assign(email_key=email_keys.values), columns + ['email_key']))
+
+    conn.execute("""
+        DELETE FROM temp.employee_batch WHERE EXISTS (
+            SELECT 1 FROM employees e
+            WHERE lower(trim(e."Email")) = employee_batch.email_key
+              AND e."Employee_ID" IS NOT employee_batch."Employee_ID"
+        )
+    """)
+    conn.execute('DELETE FROM employees WHERE "Employee_ID" IN (SELECT "Employee_ID" FROM temp.employee_batch)')
+    upserted = conn.execute(f"INSERT INTO employees ({quoted}) SELECT {quoted} FROM temp.employee_batch").rowcount
+    conn.execute("DROP TABLE temp.employee_batch")
+    return upserted
+
+def read_etl_metadata(conn: sqlite3.Connection) -> dict:
+    """
+    Run-level facts recorded by the last load (empty when the table does not exist).
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'etl_metadata'").fetchone()
+    return dict(conn.execute("SELECT key, value FROM etl_metadata").fetchall()) if exists else {}
+
+def has_employees_table(db_path: str = DB_PATH) -> bool:
+    """
+    Returns True when the database file already holds a loaded employees table.
+    """
+    if not os.path.exists(db_path):
+        return False
+    with closing(sqlite3.connect(db_path)) as conn:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employees'"
+        ).fetchone()
+    return row is not None
+
+class CapturingSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase that records every SQL string the agent's tools run into agent_queries,
+    with its duration, error (if any) and EXPLAIN QUERY PLAN, for src.index_advisor.
+    Captures are only queued on the request path; an AgentQueryWriter (started on the first
+    capture, flushed at exit) takes the plans and writes them in batches. Recording never
+    fails the query itself. Unless the caller picks tables, only employees is exposed to
+    the agent; query_logs, agent_queries and the other bookkeeping tables are hidden from
+    its schema.
+    """
+
+    def __init__(self, engine, *args, **kwargs):
+        if 'include_tables' not in kwargs and 'ignore_tables' not in kwargs:
+            kwargs['include_tables'] = ['employees']
+        super().__init__(engine, *args, **kwargs)
+        self._capture_writer: Optional[AgentQueryWriter] = None
+        self._capture_lock = threading.Lock()
+
+    def run(self, command, fetch="all", include_columns=False, **kwargs):
+        if not isinstance(command, str):
+            return super().run(command, fetch, include_columns, **kwargs)
+        start = time.perf_counter()
+        error = None
+        try:
+            return super().run(command, fetch, include_columns, **kwargs)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._capture(command, (time.perf_counter() - start) * 1000, error)
+
+    @property
+    def capture_writer(self) -> "AgentQueryWriter":
+        if self._capture_writer is None:
+            with self._capture_lock:
+                if self._capture_writer is None:
+                    writer = AgentQueryWriter(self)
+                    writer.start()
+                    atexit.register(writer.close)
+                    self._capture_writer = writer
+        return self._capture_writer
+
+    def _capture(self, sql: str, duration_ms: float, error: Optional[str]):
+        try:
+            self.capture_writer.submit(sql, duration_ms, error)
+        except Exception as e:
+            logger.warning(f"Failed to capture agent query: {e}")
+
+    def close_capture(self):
+        """
+        Writes the captures still queued and stops the capture writer.
+        """
+        if self._capture_writer is not None:
+            self._capture_writer.close()
+            atexit.unregister(self._capture_writer.close)
+            self._capture_writer = None
+
+def attach_db(db_path: str = DB_PATH) -> SQLDatabase:
+    """
+    Opens a database already populated by the ETL bulk loader, without any pandas step.
+    """
+    try:
+        engine = create_snapshot_engine(db_path)
+        with engine.connect() as connection:
+            from sqlalchemy import text
+            connection.execute(text(QUERY_LOGS_DDL))
+            connection.execute(text(AGENT_QUERIES_DDL))
+            connection.commit()
+
+        logger.info(f"Attached existing database at {db_path}.")
+        return CapturingSQLDatabase(engine)
+    except Exception as e:
+        logger.error(f"Failed to attach database: {e}")
+        raise e
+
 def init_db(df: pd.DataFrame):
     """
     Initializes a SQLite database from the provided DataFrame.
     Persists data to disk to allow access across Streamlit threads.
+    The table is built in a new snapshot file and hot-swapped in (see publish_snapshot),
+    so sessions querying the current database never see it half-written.
     """
+    snapshot_path = new_snapshot_path(DB_PATH)
     try:
-        db_path = "data/processed/hr.db"
-        engine = create_engine(f"sqlite:///{db_path}") 
-        
+        build_engine = create_engine(f"sqlite:///{snapshot_path}")
+
         # Persist DataFrame to 'employees' table
-        df.to_sql("employees", engine, if_exists="replace", index=False)
-        
-        # Create Logs Table (for Training Data)
-        with engine.connect() as connection:
-            from sqlalchemy import text
-            connection.execute(text("""
-                CREATE TABLE IF NOT EXISTS query_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    user_query TEXT,
-                    agent_response TEXT,
-                    verification_status TEXT
-                )
-            """))
-            connection.commit()
-        
+        df.to_sql("employees", build_engine, if_exists="replace", index=False)
+        with build_engine.begin() as connection:
+            create_employee_indexes(connection, list(df.columns))
+        build_engine.dispose()
+
+        # Logs Table (for Training Data) is carried over from the current database
+        publish_snapshot(snapshot_path, DB_PATH)
+        engine = create_snapshot_engine(DB_PATH)
+
         logger.info(f"Database initialized with {len(df)} employee records and Logging Table.")
         
-        return SQLDatabase(engine)
+        return CapturingSQLDatabase(engine)
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
+        if os.path.exists(snapshot_path) and current_snapshot(DB_PATH) != os.path.realpath(snapshot_path):
+            os.remove(snapshot_path)
         raise e
 
-def log_interaction(db: SQLDatabase, user_query: str, agent_response: str, status: str):
+def log_interaction(db: SQLDatabase, user_query: str, agent_response: str, status: str,
+                    writer: Optional["QueryLogWriter"] = None):
     """
     Persists the interaction to the database for future fine-tuning/training.
+    Large responses are stored compressed (see compress_response); read them back with
+    src.log_archive.read_query_logs. With a QueryLogWriter the entry is only queued and written in the background.
     """
+    if writer is not None:
+        writer.submit(user_query, agent_response, status)
+        return
     try:
         # We need to access the underlying sqlalchemy engine/connection
         # SQLDatabase wrapper is read-only for the agent, but we can write via the engine
@@ -51,7 +654,151 @@ def log_interaction(db: SQLDatabase, user_query: str, agent_response: str, statu
                 INSERT INTO query_logs (user_query, agent_response, verification_status)
                 VALUES (:q, :a, :s)
             """)
-            connection.execute(stmt, {"q": user_query, "a": agent_response, "s": status})
+            connection.execute(stmt, {"q": user_query, "a": compress_response(agent_response), "s": status})
             connection.commit()
     except Exception as e:
         logger.error(f"Failed to log interaction: {e}")
+
+class _BatchedWriter(threading.Thread):
+    """
+    Writes entries on a background thread, so the caller never waits on a commit.
+
+    Entries go through a bounded queue that never blocks: when it is full the entry is
+    dropped, counted in `dropped` and reported in the log. The thread writes entries in
+    batches, one transaction each, as soon as batch_size are pending or the oldest has
+    waited flush_interval seconds. close() writes everything still queued and logs the
+    totals. Writes go through the db's engine, so they follow snapshot swaps.
+    Subclasses build the entries in submit() and write a batch in _write_batch().
+    """
+
+    # Names the writer in its log messages
+    description = "Entry"
+
+    def __init__(self, db: SQLDatabase, name: str, queue_size: int = LOG_QUEUE_SIZE,
+                 batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(name=name, daemon=True)
+        self._db = db
+        self._entries = queue.Queue(maxsize=max(1, queue_size))
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._drop_lock = threading.Lock()
+
+    def _enqueue(self, entry: dict) -> bool:
+        try:
+            self._entries.put_nowait(entry)
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % LOG_DROP_REPORT_EVERY == 0:
+                logger.warning(f"{self.description} queue full ({self._entries.maxsize} entries): "
+                               f"{dropped} entries dropped so far.")
+            return False
+
+    def _write_batch(self, connection, batch: list):
+        raise NotImplementedError
+
+    def _flush(self, batch: list):
+        try:
+            with self._db._engine.begin() as connection:
+                self._write_batch(connection, batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} {self.description.lower()} entries: {e}")
+
+    def run(self):
+        batch = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            try:
+                item = self._entries.get(timeout=None if not batch else max(0.0, deadline - time.monotonic()))
+                if item is None:
+                    stopping = True
+                else:
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+
+    def close(self):
+        """
+        Writes the queued entries, stops the thread and logs what was written and dropped.
+        """
+        if self.is_alive():
+            self._entries.put(None)
+            self.join()
+        logger.info(f"{self.description} writer stopped: {self.written} entries written, "
+                    f"{self.dropped} dropped (queue full), {self.failed} failed.")
+
+class QueryLogWriter(_BatchedWriter):
+    """
+    Writes query_logs entries on a background thread, so a chat turn never waits on a commit
+    (see _BatchedWriter for queueing, batching and dropping). Entries keep the time they were
+    submitted as their timestamp; large responses are compressed on the writer thread.
+    """
+
+    description = "Query log"
+
+    def __init__(self, db: SQLDatabase, queue_size: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(db, "query-log-writer", queue_size, batch_size, flush_interval)
+
+    def submit(self, user_query: str, agent_response: str, status: str) -> bool:
+        """
+        Queues an entry; returns False when it was dropped because the queue is full.
+        """
+        return self._enqueue({"t": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                              "q": user_query, "a": agent_response, "s": status})
+
+    def _write_batch(self, connection, batch: list):
+        from sqlalchemy import text
+        connection.execute(text("""
+            INSERT INTO query_logs (timestamp, user_query, agent_response, verification_status)
+            VALUES (:t, :q, :a, :s)
+        """), [{**entry, "a": compress_response(entry["a"])} for entry in batch])
+
+class AgentQueryWriter(_BatchedWriter):
+    """
+    Writes agent_queries captures on a background thread (see _BatchedWriter), so the agent's
+    SQL calls never wait on EXPLAIN QUERY PLAN or a commit. Plans are taken on the writer
+    thread, against the snapshot published at that moment. Entries keep the time they
+    were submitted as their timestamp.
+    """
+
+    description = "Agent query capture"
+
+    def __init__(self, db: SQLDatabase, queue_size: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(db, "agent-query-writer", queue_size, batch_size, flush_interval)
+
+    def submit(self, sql: str, duration_ms: float, error: Optional[str]) -> bool:
+        """
+        Queues a capture; returns False when it was dropped because the queue is full.
+        """
+        return self._enqueue({"t": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                              "sql": sql, "ms": round(duration_ms, 3), "error": error})
+
+    def _write_batch(self, connection, batch: list):
+        from sqlalchemy import text
+        for entry in batch:
+            entry["plan"] = None
+            if entry["sql"].lstrip().upper().startswith(("SELECT", "WITH")):
+                try:
+                    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {entry['sql']}").fetchall()
+                    entry["plan"] = "\n".join(row[-1] for row in rows)
+                except Exception:
+                    pass
+        connection.execute(text("""
+            INSERT INTO agent_queries (timestamp, sql, query_plan, duration_ms, error)
+            VALUES (:t, :sql, :plan, :ms, :error)
+        """), batch)
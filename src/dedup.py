@@ -0,0 +1,117 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from typing import Optional
+import numpy as np
+import pandas as pd
+from src.utils import setup_logging
+
+logger = setup_logging()
+
+
+class EmailDeduplicator:
+    """
+    First-occurrence dedup of normalized emails across chunks with bounded memory.
+
+    Keys are tracked as 64-bit hashes held in sorted NumPy runs (8 bytes per key, merged
+    log-structured style so inserts stay amortized O(n log n)). A hash hit is only a
+    candidate duplicate: the exact email of every first occurrence lives in an on-disk
+    SQLite store that is consulted for candidates alone, so hash collisions never drop a
+    distinct employee. Once the hash runs outgrow memory_budget_mb they are discarded and
+    every lookup goes to the on-disk index instead (spilled mode).
+    """
+
+    def __init__(self, memory_budget_mb: float = 256, spill_dir: Optional[str] = None):
+        self.memory_budget_bytes = int(memory_budget_mb * 2**20)
+        self.spilled = False
+        self.keys_seen = 0
+        self._runs = []
+        self._work_dir = tempfile.mkdtemp(prefix="email_dedup_", dir=spill_dir)
+        self._store = sqlite3.connect(os.path.join(self._work_dir, "keys.db"))
+        self._store.execute("PRAGMA journal_mode=OFF")
+        self._store.execute("PRAGMA synchronous=OFF")
+        # Clustered on hash so lookups and inserts touch a single B-tree
+        self._store.execute("CREATE TABLE keys (hash INTEGER NOT NULL, email TEXT NOT NULL, "
+                            "PRIMARY KEY (hash, email)) WITHOUT ROWID")
+        self._store.execute("CREATE TEMP TABLE probe (hash INTEGER NOT NULL)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._store.close()
+        shutil.rmtree(self._work_dir, ignore_errors=True)
+
+    @staticmethod
+    def hash_emails(email_norm: pd.Series) -> np.ndarray:
+        """
+        Stable 64-bit hashes (identical across processes and runs) of normalized emails.
+        """
+        return pd.util.hash_array(email_norm.to_numpy(dtype=object))
+
+    def _in_runs(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def _add_to_runs(self, hashes: np.ndarray):
+        # Hashes of new keys are already distinct (barring collisions, which are harmless here)
+        self._runs.append(np.sort(hashes))
+        # Merge while the newest run is at least half the size of the one before it
+        while len(self._runs) > 1 and self._runs[-1].size * 2 >= self._runs[-2].size:
+            newest = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], newest]), kind='stable')
+
+        if sum(run.nbytes for run in self._runs) > self.memory_budget_bytes:
+            logger.info(f"Email dedup exceeded {self.memory_budget_bytes / 2**20:.0f} MB "
+                        f"at {self.keys_seen} keys. Spilling lookups to disk.")
+            self._runs = []
+            self.spilled = True
+
+    def _stored_pairs(self, hashes: np.ndarray) -> set:
+        """
+        Exact (hash, email) pairs already recorded for the given hashes.
+        """
+        self._store.execute("DELETE FROM probe")
+        self._store.executemany("INSERT INTO probe VALUES (?)", ((int(h),) for h in np.unique(hashes)))
+        rows = self._store.execute("SELECT k.hash, k.email FROM keys k JOIN probe p ON k.hash = p.hash")
+        return set(rows)
+
+    def filter(self, email_norm: pd.Series) -> np.ndarray:
+        """
+        Returns a boolean mask of rows whose normalized email has not been seen in this
+        or any earlier call. Within the batch the first occurrence wins.
+        """
+        keep = ~email_norm.duplicated(keep='first').to_numpy()
+        # SQLite integers are signed, so store the hashes reinterpreted as int64
+        hashes = self.hash_emails(email_norm).view(np.int64)
+
+        candidates = np.flatnonzero(keep)
+        if not self.spilled:
+            candidates = candidates[self._in_runs(hashes[candidates])]
+
+        if len(candidates):
+            stored = self._stored_pairs(hashes[candidates])
+            emails = email_norm.to_numpy(dtype=object)
+            seen_before = np.fromiter(((int(hashes[i]), emails[i]) in stored for i in candidates),
+                                      dtype=bool, count=len(candidates))
+            keep[candidates[seen_before]] = False
+
+        # Inserting in hash order keeps B-tree writes sequential
+        new_keys = np.flatnonzero(keep)
+        new_keys = new_keys[np.argsort(hashes[new_keys])]
+        self._store.executemany(
+            "INSERT INTO keys VALUES (?, ?)",
+            zip(hashes[new_keys].tolist(), email_norm.to_numpy(dtype=object)[new_keys].tolist()),
+        )
+        self.keys_seen += len(new_keys)
+        if not self.spilled and len(new_keys):
+            self._add_to_runs(hashes[new_keys])
+        return keep
@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+from src.utils import setup_logging
+
+logger = setup_logging()
+
+# Columns of the cleaned dataset the duplicate stage needs
+DUPLICATE_COLUMNS = ['Employee_ID', 'First_Name', 'Last_Name', 'Email', 'Phone', 'Join_Date']
+
+# Blocking passes. Rows are only compared with rows sharing all fields of at least one key.
+BLOCKING_KEYS = {
+    'phone': ['last_soundex', 'phone_suffix'],
+    'name_year': ['last_soundex', 'first_soundex', 'join_year'],
+}
+
+# Fields rows are sorted by within a block of each pass, so likely duplicates end up close together
+BLOCK_SORT_KEYS = {
+    'phone': ['first', 'last', 'phone'],
+    'name_year': ['phone', 'join_date', 'first', 'last'],
+}
+
+# Blocks up to this size are compared exhaustively
+DEFAULT_MAX_BLOCK_SIZE = 50
+
+# Rows of larger blocks are only compared with this many neighbours in sort order, keeping the work linear
+DEFAULT_WINDOW_SIZE = 5
+
+# Score contributions of matching fields; a pair scoring at least the threshold is a duplicate
+MATCH_WEIGHTS = {
+    'last_exact': 0.30,
+    'last_phonetic': 0.15,
+    'first_exact': 0.25,
+    'first_phonetic': 0.15,
+    'phone_exact': 0.30,
+    'phone_suffix': 0.20,
+    'join_date_exact': 0.15,
+    'join_year': 0.05,
+}
+DEFAULT_MATCH_THRESHOLD = 0.7
+
+# A matched pair must also agree on one of these personal identifiers. Names and join dates
+# alone are shared by many employees (common surnames, hiring waves): without this, the 200k-row
+# benchmark flagged ~78k rows that were not duplicates. The price is recall: a re-hire with
+# neither a phone number nor an email local part in common with the earlier record is not
+# flagged (~550/1000 planted copies are found instead of ~950, the rest have no phone).
+# Pass require_identifier=False to find_duplicate_clusters to trade precision back for recall.
+IDENTIFYING_FIELDS = ['phone_suffix', 'email_local']
+
+# Number of trailing phone digits used as a blocking key
+PHONE_SUFFIX_DIGITS = 7
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'), **dict.fromkeys('CGJKQSXZ', '2'), **dict.fromkeys('DT', '3'),
+    'L': '4', **dict.fromkeys('MN', '5'), 'R': '6',
+}
+
+def soundex(name) -> str:
+    """
+    American Soundex code of a name (e.g. 'Robert' -> 'R163'); None for empty input.
+    """
+    if not isinstance(name, str):
+        return None
+    letters = [c for c in name.upper() if 'A' <= c <= 'Z']
+    if not letters:
+        return None
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W do not separate letters with the same code; vowels do
+        if c not in 'HW':
+            previous = digit
+    return code.ljust(4, '0')
+
+def _soundex_series(names: pd.Series) -> pd.Series:
+    # Names repeat heavily, so encode each distinct value once
+    codes, uniques = pd.factorize(names)
+    encoded = np.append(np.array([soundex(name) for name in uniques], dtype=object), None)
+    return pd.Series(encoded[codes], index=names.index)
+
+def blocking_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalized comparison fields and blocking key parts for every row of a cleaned frame.
+    """
+    first = df['First_Name'].astype(str).str.strip().str.lower().where(df['First_Name'].notna())
+    last = df['Last_Name'].astype(str).str.strip().str.lower().where(df['Last_Name'].notna())
+    phone = df['Phone'].astype(str).str.replace(r'\D', '', regex=True).where(df['Phone'].notna())
+    join_date = df['Join_Date'].astype(str).where(df['Join_Date'].notna())
+    if 'Email' in df.columns:
+        email_local = df['Email'].astype(str).str.strip().str.lower().str.split('@').str[0].where(df['Email'].notna())
+    else:
+        email_local = pd.Series(np.nan, index=df.index, dtype=object)
+    return pd.DataFrame({
+        'first': first,
+        'last': last,
+        'first_soundex': _soundex_series(first),
+        'last_soundex': _soundex_series(last),
+        'phone': phone,
+        'phone_suffix': phone.str[-PHONE_SUFFIX_DIGITS:],
+        'join_date': join_date,
+        'join_year': join_date.str[:4],
+        'email_local': email_local,
+    }, index=df.index)
+
+def _block_pairs(features: pd.DataFrame, key: list, max_block_size: int, window_size: int,
+                 sort_by: list = ()):
+    """
+    (left, right) row-position pairs sharing the key: every pair of blocks of at most
+    max_block_size rows, and for larger blocks, sorted by sort_by, each row with the next
+    window_size rows (sorted neighbourhood). Rows with a missing key part are never blocked.
+    """
+    parts = features[key]
+    complete = parts.notna().all(axis=1).to_numpy()
+    block_ids = np.full(len(features), -1, dtype=np.int64)
+    if complete.any():
+        block_ids[complete] = parts[complete].groupby(key, sort=False).ngroup().to_numpy()
+
+    sizes = np.bincount(block_ids[complete]) if complete.any() else np.zeros(0, dtype=np.int64)
+    oversized = sizes > max_block_size
+    if oversized.any():
+        logger.info(f"Blocking key {key}: {oversized.sum()} blocks larger than {max_block_size} rows "
+                    f"({sizes[oversized].sum()} rows) compared through a window of {window_size}.")
+    eligible = complete.copy()
+    eligible[complete] = sizes[block_ids[complete]] > 1
+
+    positions = np.flatnonzero(eligible)
+    # np.lexsort sorts by its last key first: block, then the sort_by fields in order (missing last)
+    secondary = [pd.factorize(features[col].to_numpy()[positions], sort=True, use_na_sentinel=False)[0]
+                 for col in reversed(list(sort_by))]
+    order = positions[np.lexsort(secondary + [block_ids[positions]])]
+    sorted_blocks = block_ids[order]
+    windowed = oversized[sorted_blocks] if len(order) else np.zeros(0, dtype=bool)
+
+    # Rows of a block are contiguous after sorting, so pairs are rows `offset` apart in the same block
+    left, right = [], []
+    for offset in range(1, min(max(max_block_size, window_size + 1), len(order))):
+        same = sorted_blocks[:-offset] == sorted_blocks[offset:]
+        if offset > window_size:
+            same &= ~windowed[:-offset]
+        if not same.any():
+            break
+        left.append(order[:-offset][same])
+        right.append(order[offset:][same])
+    if not left:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+def candidate_pairs(features: pd.DataFrame, max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+                    window_size: int = DEFAULT_WINDOW_SIZE):
+    """
+    Distinct candidate pairs (left < right, row positions) over all blocking passes.
+    """
+    lefts, rights = [], []
+    for name, key in BLOCKING_KEYS.items():
+        left, right = _block_pairs(features, key, max_block_size, window_size, BLOCK_SORT_KEYS.get(name, ()))
+        lefts.append(np.minimum(left, right))
+        rights.append(np.maximum(left, right))
+    pairs = np.unique(np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+def score_pairs(features: pd.DataFrame, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Weighted field agreement (0-1) of each candidate pair, see MATCH_WEIGHTS.
+    Exact and phonetic matches of a field are alternatives, not cumulative.
+    """
+    def agree(column):
+        values = features[column].to_numpy(dtype=object)
+        a, b = values[left], values[right]
+        return pd.notna(a) & pd.notna(b) & (a == b)
+
+    weights = MATCH_WEIGHTS
+    last_exact, first_exact = agree('last'), agree('first')
+    phone_exact, date_exact = agree('phone'), agree('join_date')
+    return (
+        np.where(last_exact, weights['last_exact'], agree('last_soundex') * weights['last_phonetic'])
+        + np.where(first_exact, weights['first_exact'], agree('first_soundex') * weights['first_phonetic'])
+        + np.where(phone_exact, weights['phone_exact'], agree('phone_suffix') * weights['phone_suffix'])
+        + np.where(date_exact, weights['join_date_exact'], agree('join_year') * weights['join_year'])
+    )
+
+def share_identifier(features: pd.DataFrame, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Whether each candidate pair agrees on at least one of IDENTIFYING_FIELDS.
+    """
+    shared = np.zeros(len(left), dtype=bool)
+    for column in IDENTIFYING_FIELDS:
+        values = features[column].to_numpy(dtype=object)
+        a, b = values[left], values[right]
+        shared |= pd.notna(a) & pd.notna(b) & (a == b)
+    return shared
+
+def connected_components(n_rows: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Component label (the smallest row position in it) of every row, given matched pairs.
+    """
+    labels = np.arange(n_rows)
+    while True:
+        linked = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, linked)
+        np.minimum.at(updated, right, linked)
+        # Pointer jumping lets labels travel along long chains in few rounds
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+def find_duplicate_clusters(df: pd.DataFrame, threshold: float = DEFAULT_MATCH_THRESHOLD,
+                            max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+                            window_size: int = DEFAULT_WINDOW_SIZE,
+                            require_identifier: bool = True) -> pd.DataFrame:
+    """
+    Flags likely duplicate employees that email dedup cannot catch (re-hires, typos).
+
+    Rows are blocked on phonetic last name + phone suffix and on phonetic last/first
+    name + join year, scored pairwise only within blocks, and pairs scoring at least
+    threshold are merged into clusters. With require_identifier, a pair must also share
+    a phone suffix or email local part (IDENTIFYING_FIELDS; see there for the precision/
+    recall tradeoff). Blocks larger than max_block_size are sorted and each row compared
+    with its next window_size rows only, so the work is linear in the number of rows.
+
+    Returns one row per clustered employee: cluster_id, the DUPLICATE_COLUMNS and
+    match_score (the best score linking the row into its cluster), ordered by cluster.
+    """
+    df = df.reset_index(drop=True)
+    features = blocking_features(df)
+    left, right = candidate_pairs(features, max_block_size, window_size)
+    scores = score_pairs(features, left, right)
+    matched = scores >= threshold
+    if require_identifier:
+        matched &= share_identifier(features, left, right)
+    logger.info(f"Duplicate candidates: {len(left)} pairs compared, {matched.sum()} matched.")
+
+    labels = connected_components(len(df), left[matched], right[matched])
+    best = np.zeros(len(df))
+    np.maximum.at(best, left[matched], scores[matched])
+    np.maximum.at(best, right[matched], scores[matched])
+
+    clustered = np.flatnonzero(best > 0)
+    report = df.loc[clustered, [col for col in DUPLICATE_COLUMNS if col in df.columns]]
+    report.insert(0, 'cluster_id', pd.factorize(labels[clustered], sort=True)[0] + 1)
+    report['match_score'] = best[clustered].round(2)
+    return report.sort_values(['cluster_id', 'Employee_ID'], kind='stable').reset_index(drop=True)
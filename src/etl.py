@@ -1,72 +1,698 @@
 import os
+import json
+import queue
+import argparse
+import itertools
+import threading
+from collections import deque
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Optional
+import numpy as np
 import pandas as pd
-from src.utils import setup_logging, format_phone_number, clean_salary, check_schema
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.utils import (setup_logging, format_phone_series, clean_salary_series, standardize_dates,
+                       check_schema, read_processed, CATEGORICAL_COLUMNS)
+from src.metrics import PipelineMetrics, NULL_METRICS
+from src.dedup import EmailDeduplicator
+from src.checkpoint import ChunkCheckpoint
+from src.duplicates import find_duplicate_clusters, DUPLICATE_COLUMNS
+from src.sources import resolve_inputs, inputs_sha256, read_frames, iter_chunks, DEFAULT_READ_WORKERS
 
 logger = setup_logging()
 
-def run_pipeline(input_path: str, output_path: str):
+REQUIRED_COLUMNS = [
+    'Email', 'Phone', 'Department_Region', 'Salary', 
+    'Join_Date', 'First_Name', 'Last_Name', 'Performance_Score'
+]
+
+# Declared ingestion schema for employees.csv. Low-cardinality text fields are parsed straight
+# into categoricals instead of one Python object per row. Columns not listed (IDs, names, emails,
+# raw phone/salary/date) keep pandas defaults.
+# Age and Remote_Work are read as text so one malformed value ("N/A", "yes") cannot fail the
+# parse of a whole file; transform_chunk converts them (validate_ages, parse_remote_work),
+# loading unparseable values as missing. Parsing Age as text also avoids pandas silently
+# wrapping out-of-range integers in a narrow dtype (200 as Int8 reads as -56).
+INGEST_DTYPES = {
+    'Age': 'str',
+    'Department_Region': 'category',
+    'Status': 'category',
+    'Performance_Score': 'category',
+    'Remote_Work': 'category',
+}
+
+# Plausible ages (inclusive); anything else fails the run instead of being loaded
+AGE_RANGE = (0, 150)
+AGE_DTYPE = 'Int16'
+
+# Remote_Work spellings understood (case-insensitive); any other value is loaded as missing
+REMOTE_WORK_VALUES = {
+    **dict.fromkeys(['true', 't', 'yes', 'y', '1'], True),
+    **dict.fromkeys(['false', 'f', 'no', 'n', '0'], False),
+}
+
+# Salary band edges (lower bound inclusive) and labels of the derived salary_band column
+SALARY_BAND_EDGES = [0, 50_000, 75_000, 100_000, 150_000, np.inf]
+SALARY_BAND_LABELS = ['<50k', '50k-75k', '75k-100k', '100k-150k', '150k+']
+
+# Declared Arrow types of the processed Parquet output. Every chunk is converted with this schema
+# instead of whatever Arrow infers from its values: a column with no value in some chunk (e.g. no
+# phone numbers) would otherwise be typed `null`, and categories would get chunk-dependent index widths.
+OUTPUT_ARROW_TYPES = {
+    'First_Name': pa.string(),
+    'Last_Name': pa.string(),
+    'Age': pa.int16(),
+    'Join_Date': pa.string(),
+    'Salary': pa.int64(),
+    'Email': pa.string(),
+    'Phone': pa.string(),
+    'Remote_Work': pa.bool_(),
+    **{col: pa.dictionary(pa.int32(), pa.string()) for col in CATEGORICAL_COLUMNS},
+    'join_year': pa.int16(),
+    'tenure_days': pa.int32(),
+    'salary_band': pa.dictionary(pa.int32(), pa.string(), ordered=True),
+}
+
+# Chunk size used when parallel mode is requested without an explicit chunk size
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Cleaned chunks the background writer may hold in pipelined mode before the transform stage blocks
+WRITE_QUEUE_DEPTH = 4
+
+# Memory allowed for the cross-chunk email hash set before dedup spills to disk
+DEFAULT_DEDUP_MEMORY_MB = 256
+
+def read_input(input_path: str, chunksize: Optional[int] = None, read_workers: int = DEFAULT_READ_WORKERS):
+    """
+    Reads the raw extract(s) with the declared ingestion schema.
+    input_path may be a file, a directory or a glob of .csv/.csv.gz/.csv.zst files,
+    concatenated in the order documented on resolve_inputs.
+    Returns a DataFrame, or an iterator of DataFrames when chunksize is given.
+    """
+    paths = resolve_inputs(input_path)
+    if chunksize:
+        return (chunk for _, chunk in iter_chunks(paths, chunksize, INGEST_DTYPES, read_workers))
+    return read_frames(paths, INGEST_DTYPES, read_workers)
+
+def normalize_emails(emails: pd.Series) -> pd.Series:
+    """
+    Normalizes emails into the key used for deduplication (lower-cased, trimmed).
+    """
+    return emails.astype(str).str.lower().str.strip()
+
+def _broadcast_categories(values: pd.Series, codes: np.ndarray, index: pd.Index) -> pd.Series:
+    """
+    Expands per-category values to one categorical value per row.
+    Code -1 (missing input) picks the trailing None and becomes NA.
+    """
+    lookup = np.append(values.to_numpy(dtype=object), None)
+    return pd.Series(pd.Categorical(lookup[codes]), index=index)
+
+def split_department_region(dept_region: pd.Series):
+    """
+    Splits 'Department-Region' values into categorical Department and Region columns.
+    Each distinct value is split once and broadcast through the category codes.
+    """
+    if not isinstance(dept_region.dtype, pd.CategoricalDtype):
+        dept_region = dept_region.astype('category')
+    codes = dept_region.cat.codes.to_numpy()
+    split_data = pd.Series(dept_region.cat.categories.astype(str), dtype=object).str.split('-', n=1, expand=True)
+    if split_data.shape[1] == 0:
+        # No categories at all (empty or all-missing input)
+        split_data = pd.DataFrame({0: pd.Series(dtype=object)})
+    departments = _broadcast_categories(split_data[0].str.strip(), codes, dept_region.index)
+    if split_data.shape[1] > 1:
+        regions = _broadcast_categories(split_data[1].str.strip(), codes, dept_region.index)
+    else:
+        regions = pd.Series(pd.NA, index=dept_region.index, dtype='string').astype('category')
+    return departments, regions
+
+def default_as_of() -> str:
+    """
+    As-of date (ISO) used for tenure when a run does not pin one: today.
+    """
+    return date.today().isoformat()
+
+def add_derived_columns(df: pd.DataFrame, as_of: str) -> pd.DataFrame:
+    """
+    Adds precomputed query helpers to a cleaned frame, so SQL can filter on them instead of
+    doing date arithmetic on Join_Date strings:
+    - join_year: calendar year of Join_Date
+    - tenure_days: days between Join_Date and the as_of date (NA for future join dates)
+    - salary_band: SALARY_BAND_LABELS bucket of Salary
+    """
+    join_dates = pd.to_datetime(df['Join_Date'], format='%Y-%m-%d', errors='coerce')
+    df['join_year'] = join_dates.dt.year.astype('Int16')
+    tenure = (pd.Timestamp(as_of) - join_dates).dt.days
+    df['tenure_days'] = tenure.where(tenure >= 0).astype('Int32')
+    # All bands are always categories, so chunks share one categorical schema
+    df['salary_band'] = pd.cut(df['Salary'].astype('float64'), SALARY_BAND_EDGES,
+                               labels=SALARY_BAND_LABELS, right=False)
+    return df
+
+def output_arrow_schema(df: pd.DataFrame) -> pa.Schema:
+    """
+    Parquet schema of the processed output for df's columns: OUTPUT_ARROW_TYPES, and for
+    pass-through columns (e.g. Employee_ID) the type of their pandas dtype, text for
+    object/str columns. Types never depend on the values of a particular chunk.
+    """
+    fields = []
+    for col, dtype in df.dtypes.items():
+        if col in OUTPUT_ARROW_TYPES:
+            fields.append(pa.field(col, OUTPUT_ARROW_TYPES[col]))
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            fields.append(pa.field(col, pa.string()))
+        else:
+            fields.append(pa.Schema.from_pandas(df[[col]], preserve_index=False).field(col))
+    return pa.schema(fields)
+
+def validate_ages(ages: pd.Series) -> pd.Series:
+    """
+    Converts raw Age values to AGE_DTYPE. Values that are not whole numbers ("N/A", "25.5")
+    become missing and are counted in a warning. Numbers outside AGE_RANGE raise ValueError
+    naming the offending values: they point at a broken extract, not a typo.
+    """
+    numbers = pd.to_numeric(ages, errors='coerce')
+    unparsed = ages.notna() & (numbers.isna() | (numbers % 1 != 0))
+    if unparsed.any():
+        examples = ages[unparsed].unique()[:5].tolist()
+        logger.warning(f"Age: {unparsed.sum()} values that are not whole numbers loaded as missing, e.g. {examples}.")
+        numbers = numbers.where(~unparsed)
+    invalid = numbers.notna() & ~numbers.between(*AGE_RANGE)
+    if invalid.any():
+        examples = ages[invalid].unique()[:5].tolist()
+        raise ValueError(f"Age outside {AGE_RANGE[0]}-{AGE_RANGE[1]} in {invalid.sum()} rows, e.g. {examples}.")
+    return numbers.astype(AGE_DTYPE)
+
+def parse_remote_work(values: pd.Series) -> pd.Series:
+    """
+    Converts raw Remote_Work values to nullable booleans using REMOTE_WORK_VALUES. Other
+    values become missing and are counted in a warning.
+    """
+    parsed = values.astype('str').str.strip().str.lower().map(REMOTE_WORK_VALUES).astype('boolean')
+    unparsed = values.notna() & parsed.isna()
+    if unparsed.any():
+        examples = values[unparsed].astype('str').unique()[:5].tolist()
+        logger.warning(f"Remote_Work: {unparsed.sum()} unrecognized values loaded as missing, e.g. {examples}.")
+    return parsed
+
+def transform_chunk(df: pd.DataFrame, metrics: PipelineMetrics = NULL_METRICS,
+                    as_of: Optional[str] = None) -> pd.DataFrame:
+    """
+    Applies the cleaning and standardization steps to a deduplicated frame.
+    Rows are independent, so this works on a full dataset or any chunk of it.
+    as_of anchors tenure_days (default: today); pass the same value for every chunk of a run.
+    """
+    df = df.copy()
+    rows = len(df)
+    if 'Age' in df.columns:
+        df['Age'] = validate_ages(df['Age'])
+    if 'Remote_Work' in df.columns:
+        df['Remote_Work'] = parse_remote_work(df['Remote_Work'])
+
+    # 3. Data Cleaning
+    # Standardize formats to ensure consistent downstream analysis
+    with metrics.stage('phone', rows):
+        df['Phone'] = format_phone_series(df['Phone'])
+    with metrics.stage('salary', rows):
+        df['Salary'] = clean_salary_series(df['Salary'])
+    
+    # 4. Feature Engineering & Standardization
+    # Split 'Department_Region' (e.g., "Sales-US") into separate columns for granular aggregations
+    with metrics.stage('split', rows):
+        df['Department'], df['Region'] = split_department_region(df['Department_Region'])
+        
+    # CRITICAL: Standardization of Date Format
+    # Convert all dates to ISO 8601 (YYYY-MM-DD) to ensure correct chronological sorting in SQL.
+    # Without this, '10/01/2023' (String) would sort before '02/01/2020' (String).
+    if 'Join_Date' in df.columns:
+        with metrics.stage('dates', rows):
+            df['Join_Date'], format_counts = standardize_dates(df['Join_Date'])
+        logger.info(f"Join_Date formats used: {format_counts}")
+        if format_counts.get('unparsed'):
+            logger.warning(f"Join_Date: {format_counts['unparsed']} values matching no detected format loaded as missing.")
+        
+    # Remove redundant composite column after splitting
+    df = df.drop(columns=['Department_Region'])
+
+    # 5. Derived columns for indexed filtering (tenure, join year, salary band)
+    with metrics.stage('derive', rows):
+        return add_derived_columns(df, as_of or default_as_of())
+
+def _transform_with_metrics(df: pd.DataFrame, as_of: Optional[str] = None):
+    """
+    Process-pool entry point: transforms a chunk and returns its stage metrics with it.
+    """
+    metrics = PipelineMetrics()
+    return transform_chunk(df, metrics, as_of), metrics.stages
+
+class ProcessedWriter:
+    """
+    Incrementally writes cleaned frames to the processed output.
+    The format follows the file extension: .parquet keeps the dtypes worked out by the
+    pipeline (Int64 salary, categorical department/region); anything else is written as CSV.
+    An optional csv_export path receives a CSV copy alongside a Parquet output, and an
+    optional db_path bulk-loads the same rows straight into the SQLite employees table.
+    metadata (e.g. the as-of date) is stored in the Parquet footer and the etl_metadata table.
+    Files are written under temp names next to their targets and renamed into place only
+    when the whole run (including the database load) succeeded, so a failed run leaves the
+    previous output untouched instead of a truncated file that still reads cleanly.
+    """
+
+    def __init__(self, output_path: str, csv_export: Optional[str] = None, db_path: Optional[str] = None,
+                 metadata: Optional[dict] = None):
+        self.output_path = output_path
+        self.csv_export = csv_export
+        self.db_path = db_path
+        self.metadata = metadata or {}
+        self.rows_written = 0
+        self._parquet_writer = None
+        self._csv_files = []
+        self._db_loader = None
+        # final path -> temp path it is written under until the run succeeds
+        self._staged = {}
+
+    def _stage(self, path: str) -> str:
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        self._staged[path] = os.path.join(directory, f".{os.path.basename(path)}.tmp-{os.getpid()}")
+        return self._staged[path]
+
+    def __enter__(self):
+        csv_paths = [self.csv_export] if self.csv_export else []
+        if not self.output_path.endswith('.parquet'):
+            csv_paths.insert(0, self.output_path)
+        for path in csv_paths:
+            self._csv_files.append(open(self._stage(path), 'w', newline=''))
+        if self.db_path:
+            # Imported lazily so CSV/Parquet-only runs do not need the DB stack
+            from src.db import EmployeeBulkLoader
+            self._db_loader = EmployeeBulkLoader(self.db_path, metadata=self.metadata).__enter__()
+        return self
+
+    def write(self, df: pd.DataFrame):
+        if self.output_path.endswith('.parquet'):
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(df, schema=output_arrow_schema(df), preserve_index=False)
+                schema = table.schema.with_metadata({
+                    **table.schema.metadata,
+                    **{f"hr_etl.{key}".encode(): str(value).encode() for key, value in self.metadata.items()},
+                })
+                self._parquet_writer = pq.ParquetWriter(self._stage(self.output_path), schema)
+            else:
+                table = pa.Table.from_pandas(df, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+        for csv_file in self._csv_files:
+            df.to_csv(csv_file, index=False, header=(self.rows_written == 0))
+        if self._db_loader is not None:
+            self._db_loader.write(df)
+        self.rows_written += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+            for csv_file in self._csv_files:
+                csv_file.close()
+            if self._db_loader is not None:
+                self._db_loader.__exit__(exc_type, exc, tb)
+            if exc_type is None:
+                for path, staged in self._staged.items():
+                    os.replace(staged, path)
+        finally:
+            for staged in self._staged.values():
+                if os.path.exists(staged):
+                    os.remove(staged)
+        return False
+
+class _BackgroundWriter(threading.Thread):
+    """
+    Write stage of the pipelined mode: drains a bounded queue of cleaned chunks on its own
+    thread so serialization overlaps with reading and transforming.
+    submit() blocks while the queue is full (back-pressure) and re-raises a write error
+    in the producer; after an error the remaining chunks are discarded so close() never hangs.
+    """
+
+    def __init__(self, write, depth: int = WRITE_QUEUE_DEPTH):
+        super().__init__(name="etl-writer", daemon=True)
+        self._write = write
+        self._frames = queue.Queue(maxsize=max(1, depth))
+        self.error = None
+
+    def run(self):
+        while True:
+            item = self._frames.get()
+            if item is None:
+                return
+            if self.error is None:
+                try:
+                    self._write(item)
+                except BaseException as e:
+                    self.error = e
+
+    def submit(self, df: pd.DataFrame):
+        while True:
+            if self.error is not None:
+                raise self.error
+            try:
+                self._frames.put(df, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """
+        Waits for queued chunks to be written; raises the first write error, if any.
+        """
+        self._frames.put(None)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+def _stream_pipeline(input_path: str, output_path: str, chunk_size: int, workers: int = 1,
+                     csv_export: Optional[str] = None, db_path: Optional[str] = None,
+                     metrics: PipelineMetrics = NULL_METRICS,
+                     dedup_memory_mb: float = DEFAULT_DEDUP_MEMORY_MB,
+                     read_workers: int = DEFAULT_READ_WORKERS, pipelined: bool = False,
+                     checkpoint: bool = False,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     as_of: Optional[str] = None) -> int:
+    """
+    Processes the input in fixed-size chunks so peak memory is bounded by chunk_size.
+    Emails seen in earlier chunks are remembered as 64-bit hashes by EmailDeduplicator,
+    keeping first-occurrence dedup global within dedup_memory_mb.
+
+    Multiple input files are parsed ahead on up to read_workers threads and consumed in
+    resolve_inputs order, so dedup across files is stable. Every file must carry the
+    columns of the first one; chunks are aligned to that column order.
+
+    With workers > 1, deduplicated chunks are transformed on a process pool while the
+    parent keeps reading; results are written back in input order, so the output is
+    identical to the single-process run.
+
+    With pipelined=True, writing moves to a background thread fed through a bounded
+    queue, so read (prefetching threads), transform (this process or the pool) and write
+    all run at once. Each stage blocks when the queue ahead of it is full, and an error
+    in any stage stops the run and is raised here.
+
+    With checkpoint=True, finished chunks are committed to a ChunkCheckpoint instead of the
+    output. A rerun after a failure replays the dedup keys from the stored parts, skips
+    completed input files and chunks, and carries on; once every chunk is done the output
+    is assembled from the parts, so it is byte-identical however often the run was resumed.
+    A resumed run keeps the as-of date recorded in the checkpoint unless as_of is given.
+    progress is handed to iter_chunks. Returns the number of rows written.
+    """
+    rows_in = 0
+    columns = None
+    pending = deque()
+    # Cap in-flight chunks so memory stays bounded by chunk_size * workers
+    max_pending = workers * 2
+
+    input_files = resolve_inputs(input_path)
+    file_indexes = {path: i for i, path in enumerate(input_files)}
+    chunk_checkpoint = None
+    if checkpoint:
+        chunk_checkpoint = ChunkCheckpoint(output_path, input_files, chunk_size, as_of)
+        chunk_checkpoint.load()
+        as_of = chunk_checkpoint.as_of = chunk_checkpoint.as_of or as_of or default_as_of()
+    as_of = as_of or default_as_of()
+
+    def serialize(item):
+        position, cleaned = item
+        if chunk_checkpoint is not None:
+            with metrics.stage('checkpoint', 0 if cleaned is None else len(cleaned)):
+                chunk_checkpoint.commit(*position, cleaned)
+        elif cleaned is not None:
+            with metrics.stage('serialize', len(cleaned)):
+                writer.write(cleaned)
+
+    def collect(position, future):
+        if future is None:
+            return position, None
+        # Worker results carry their own stage metrics when metrics are enabled
+        if metrics.enabled:
+            cleaned, stages = future.result()
+            metrics.merge(stages)
+            return position, cleaned
+        return position, future.result()
+
+    task = _transform_with_metrics if metrics.enabled else transform_chunk
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()
+    dedup = EmailDeduplicator(memory_budget_mb=dedup_memory_mb, spill_dir=os.path.dirname(output_path) or None)
+    # Checkpointed runs only open the output once all chunks are done
+    metadata = {'as_of_date': as_of}
+    sink = ProcessedWriter(output_path, csv_export, db_path, metadata) if chunk_checkpoint is None else nullcontext()
+    with pool, dedup, sink as writer:
+        first_file = 0
+        if chunk_checkpoint is not None and chunk_checkpoint.position is not None:
+            with metrics.stage('replay'):
+                for part in chunk_checkpoint.read_parts(columns=['Email']):
+                    dedup.filter(normalize_emails(part['Email']))
+            # Earlier files are complete; the last one is re-read and its finished chunks skipped
+            first_file = chunk_checkpoint.position[0]
+
+        background = _BackgroundWriter(serialize) if pipelined else None
+        write = background.submit if background is not None else serialize
+        if background is not None:
+            background.start()
+        reader = iter_chunks(input_files[first_file:], chunk_size, INGEST_DTYPES, read_workers, progress=progress)
+        current_path, file_chunk_no = None, -1
+        try:
+            for chunk_no in itertools.count():
+                with metrics.stage('load') as stage:
+                    path, chunk = next(reader, (None, None))
+                    stage.rows_in = 0 if chunk is None else len(chunk)
+                if chunk is None:
+                    break
+                if columns is None:
+                    check_schema(chunk, REQUIRED_COLUMNS)
+                    columns = list(chunk.columns)
+                elif list(chunk.columns) != columns:
+                    check_schema(chunk, columns)
+                    chunk = chunk[columns]
+
+                file_chunk_no = file_chunk_no + 1 if path == current_path else 0
+                current_path = path
+                position = (file_indexes[path], file_chunk_no)
+                if chunk_checkpoint is not None and chunk_checkpoint.is_done(*position):
+                    continue
+                rows_in += len(chunk)
+
+                with metrics.stage('dedup', len(chunk)) as stage:
+                    keep = dedup.filter(normalize_emails(chunk['Email']))
+                    stage.rows_out = int(keep.sum())
+
+                # Chunks emptied by dedup still pass through in order so checkpoints advance
+                if workers > 1:
+                    pending.append((position, pool.submit(task, chunk[keep], as_of=as_of) if keep.any() else None))
+                    while len(pending) >= max_pending:
+                        write(collect(*pending.popleft()))
+                else:
+                    write((position, transform_chunk(chunk[keep], metrics, as_of) if keep.any() else None))
+                logger.info(f"Chunk {chunk_no} ({os.path.basename(path)}): {len(chunk)} rows read, {keep.sum()} kept.")
+
+            while pending:
+                write(collect(*pending.popleft()))
+        finally:
+            # Stops the prefetching readers if the run ended early
+            reader.close()
+            if background is not None:
+                # Flushes queued chunks before the writer is closed
+                background.close()
+
+    if chunk_checkpoint is not None:
+        with ProcessedWriter(output_path, csv_export, db_path, metadata) as writer:
+            for part in chunk_checkpoint.read_parts():
+                with metrics.stage('serialize', len(part)):
+                    writer.write(part)
+        chunk_checkpoint.remove()
+
+    rows_out = writer.rows_written
+    logger.info(f"Dropped {rows_in - rows_out} duplicate rows. New count: {rows_out}")
+    return rows_out
+
+def _manifest_path(output_path: str) -> str:
+    return f"{output_path}.manifest.json"
+
+def _output_stamp(output_path: str) -> list:
+    """
+    Cheap identity for the processed output (size, mtime) to detect external edits.
+    """
+    stat = os.stat(output_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def row_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """
+    Computes a 64-bit content fingerprint for every raw row, keyed by Employee_ID.
+    """
+    fingerprints = pd.util.hash_pandas_object(df, index=False)
+    return pd.Series(fingerprints.values, index=df['Employee_ID'].astype(str))
+
+def _incremental_pipeline(input_path: str, output_path: str, csv_export: Optional[str] = None,
+                          db_path: Optional[str] = None, metrics: PipelineMetrics = NULL_METRICS,
+                          as_of: Optional[str] = None):
+    """
+    Re-runs the pipeline transforming only rows that are new or changed since the last run.
+    A manifest next to the output records the input files' hash and per-row fingerprints.
+    Returns None without touching anything when the input is unchanged.
+    Derived columns are recomputed for every row, since reused rows carry an older as-of date.
+    """
+    manifest_file = _manifest_path(output_path)
+    with metrics.stage('hash_input'):
+        input_hash = inputs_sha256(resolve_inputs(input_path))
+
+    manifest = None
+    if os.path.exists(manifest_file) and os.path.exists(output_path):
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        if manifest.get('output_stamp') != _output_stamp(output_path):
+            logger.info("Processed output changed since last run. Rebuilding from scratch.")
+            manifest = None
+
+    if manifest and manifest.get('input_sha256') == input_hash:
+        logger.info("Input unchanged since last run. Nothing to do.")
+        return None
+
+    with metrics.stage('load') as stage:
+        df = read_input(input_path)
+        stage.rows_in = len(df)
+    logger.info(f"Loaded {len(df)} rows.")
+    check_schema(df, REQUIRED_COLUMNS + ['Employee_ID'])
+
+    with metrics.stage('fingerprint', len(df)):
+        fingerprints = row_fingerprints(df)
+
+    # Dedup always runs over the full input: an edit early in the file can change which row wins
+    initial_count = len(df)
+    with metrics.stage('dedup', initial_count) as stage:
+        kept = ~normalize_emails(df['Email']).duplicated(keep='first').values
+        df = df[kept]
+        fingerprints = fingerprints[kept]
+        stage.rows_out = len(df)
+    logger.info(f"Dropped {initial_count - len(df)} duplicate rows. New count: {len(df)}")
+
+    previous = pd.Series(manifest['fingerprints'], dtype='uint64') if manifest else pd.Series(dtype='uint64')
+    unchanged = fingerprints.index.isin(previous.index)
+    unchanged[unchanged] = (previous.reindex(fingerprints.index[unchanged]).values == fingerprints.values[unchanged])
+    if fingerprints.index.duplicated().any():
+        logger.warning("Employee_ID is not unique after dedup. Transforming all rows.")
+        unchanged[:] = False
+
+    if unchanged.any():
+        with metrics.stage('reuse', int(unchanged.sum())):
+            prior_output = read_processed(output_path)
+            # Fingerprints are keyed by the ID as text; Parquet may have stored it as a number
+            prior_output.index = prior_output['Employee_ID'].astype(str)
+            reused = prior_output.loc[fingerprints.index[unchanged]]
+            reused.index = df.index[unchanged]
+            # Same Employee_ID values and dtype as the freshly transformed rows
+            reused['Employee_ID'] = df.loc[unchanged, 'Employee_ID']
+    else:
+        reused = None
+
+    logger.info(f"Reusing {unchanged.sum()} unchanged rows, transforming {(~unchanged).sum()} new or changed rows.")
+    as_of = as_of or default_as_of()
+    transformed = transform_chunk(df[~unchanged], metrics, as_of) if (~unchanged).any() else None
+
+    parts = [part for part in (reused, transformed) if part is not None]
+    merged = pd.concat(parts).sort_index() if parts else df
+    if transformed is not None:
+        merged = merged[transformed.columns]
+    # Concatenating categoricals with different categories degrades them to object
+    for col in CATEGORICAL_COLUMNS:
+        if col in merged.columns:
+            merged[col] = merged[col].astype('category')
+    if 'Join_Date' in merged.columns:
+        merged = add_derived_columns(merged, as_of)
+
+    with metrics.stage('serialize', len(merged)), \
+            ProcessedWriter(output_path, csv_export, db_path, {'as_of_date': as_of}) as writer:
+        writer.write(merged)
+
+    with open(manifest_file, 'w') as f:
+        json.dump({
+            'input_path': input_path,
+            'input_sha256': input_hash,
+            'output_stamp': _output_stamp(output_path),
+            'fingerprints': {emp_id: int(fp) for emp_id, fp in fingerprints.items()},
+        }, f)
+
+    return merged.reset_index(drop=True)
+
+def run_pipeline(input_path: str, output_path: str, chunk_size: Optional[int] = None,
+                 workers: int = 1, incremental: bool = False, csv_export: Optional[str] = None,
+                 db_path: Optional[str] = None, metrics: Optional[PipelineMetrics] = None,
+                 write_metrics: bool = False, dedup_memory_mb: float = DEFAULT_DEDUP_MEMORY_MB,
+                 read_workers: int = DEFAULT_READ_WORKERS, pipelined: bool = False,
+                 duplicates_report: Optional[str] = None, checkpoint: bool = False,
+                 progress: Optional[Callable[[float], None]] = None, as_of: Optional[str] = None):
     """
     Executes the ETL pipeline:
     1. Load Data
     2. Validate Schema
     3. Clean & Transform
     4. Save Data
+
+    input_path may be a single CSV, a directory or a glob; .gz and .zst files are
+    decompressed on the fly and up to read_workers files are read concurrently. Files are
+    processed in sorted path order and the first occurrence of an email in that order wins.
+
+    When chunk_size is set, the input is streamed in chunks of that many rows and
+    written incrementally; the cleaned frame is not held in memory, so None is returned.
+    workers > 1 additionally spreads the chunk transforms over a process pool, and
+    pipelined=True writes on a background thread behind a bounded queue so reading,
+    transforming and writing overlap.
+    checkpoint=True records every finished chunk under <output_path>.checkpoint/; after a
+    failure the same call resumes from the last durable chunk and produces byte-identical output.
+    Cross-chunk dedup keeps hashed emails in memory up to dedup_memory_mb, then spills to disk.
+
+    With incremental=True, only rows that are new or changed since the previous
+    incremental run are transformed; an unchanged input is skipped and None is returned.
+
+    A .parquet output_path is written in columnar form with pipeline dtypes preserved;
+    csv_export optionally writes a CSV copy as well, and db_path bulk-loads the rows
+    directly into that SQLite database so the app can attach it without re-parsing.
+
+    duplicates_report names a CSV that receives clusters of likely duplicate employees
+    with different emails (re-hires, typos), found by blocked fuzzy matching over the
+    cleaned output; see find_duplicate_clusters. Rows are reported, never dropped.
+
+    The cleaned data gains join_year, tenure_days and salary_band (see add_derived_columns).
+    tenure_days is anchored to as_of (ISO date, default today), which is recorded in the
+    Parquet metadata and the etl_metadata table so the agent can cite it.
+
+    progress, if given, is called with the fraction (0-1) of input bytes consumed: after
+    every chunk in streaming mode, and with 1.0 once the run has finished.
+
+    Pass a PipelineMetrics to collect per-stage wall/CPU time, row counts and peak memory;
+    write_metrics=True also saves them to <output_path>.metrics.json. Without either,
+    instrumentation is disabled.
     """
     logger.info(f"Starting ETL pipeline. Input: {input_path}")
     
-    if not os.path.exists(input_path):
+    try:
+        input_files = resolve_inputs(input_path)
+    except FileNotFoundError:
         logger.error(f"Input file not found: {input_path}")
-        raise FileNotFoundError(f"Input file {input_path} does not exist.")
+        raise
+    if len(input_files) > 1:
+        logger.info(f"Reading {len(input_files)} input files in order: {input_files}")
+
+    if metrics is None:
+        metrics = PipelineMetrics() if write_metrics else NULL_METRICS
     
     try:
-        df = pd.read_csv(input_path)
-        logger.info(f"Loaded {len(df)} rows.")
-        
-        # 1. Schema Validation (Strict Mode)
-        required_columns = [
-            'Email', 'Phone', 'Department_Region', 'Salary', 
-            'Join_Date', 'First_Name', 'Last_Name', 'Performance_Score'
-        ]
-        check_schema(df, required_columns)
-        
-        # 2. Deduplication
-        initial_count = len(df)
-        # Normalize email for deduplication
-        df['email_norm'] = df['Email'].astype(str).str.lower().str.strip()
-        df = df.drop_duplicates(subset=['email_norm'], keep='first')
-        df = df.drop(columns=['email_norm'])
-        logger.info(f"Dropped {initial_count - len(df)} duplicate rows. New count: {len(df)}")
-        
-        # 3. Data Cleaning
-        # Standardize formats to ensure consistent downstream analysis
-        logger.info("Cleaning Phone numbers and Salaries...")
-        df['Phone'] = df['Phone'].apply(format_phone_number)
-        df['Salary'] = df['Salary'].apply(clean_salary).astype('Int64')
-        
-        # 4. Feature Engineering & Standardization
-        logger.info("Splitting Department_Region and Standardizing Dates...")
-        
-        # Split 'Department_Region' (e.g., "Sales-US") into separate columns for granular aggregations
-        split_data = df['Department_Region'].astype(str).str.split('-', n=1, expand=True)
-        df['Department'] = split_data[0].str.strip()
-        if split_data.shape[1] > 1:
-            df['Region'] = split_data[1].str.strip()
-        else:
-            df['Region'] = pd.NA
-            
-        # CRITICAL: Standardization of Date Format
-        # Convert all dates to ISO 8601 (YYYY-MM-DD) to ensure correct chronological sorting in SQL.
-        # Without this, '10/01/2023' (String) would sort before '02/01/2020' (String).
-        if 'Join_Date' in df.columns:
-            df['Join_Date'] = pd.to_datetime(df['Join_Date'], errors='coerce').dt.strftime('%Y-%m-%d')
-            
-        # Remove redundant composite column after splitting
-        df = df.drop(columns=['Department_Region'])
-        
-        # 5. Serialization
-        # Save processed data to a stable location for the Agent/DB loader
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        df.to_csv(output_path, index=False)
+        with metrics.stage('total'):
+            df = _run_mode(input_path, output_path, chunk_size, workers, incremental, csv_export, db_path,
+                           metrics, dedup_memory_mb, read_workers, pipelined, checkpoint, progress, as_of)
+            if duplicates_report:
+                _write_duplicates_report(output_path, duplicates_report, metrics)
+        if write_metrics:
+            metrics.write_json(f"{output_path}.metrics.json")
+        if progress is not None:
+            progress(1.0)
         logger.info(f"Pipeline finished. Cleaned data saved to {output_path}")
         return df
 
@@ -74,8 +700,116 @@ def run_pipeline(input_path: str, output_path: str):
         logger.error(f"ETL Pipeline failed: {e}")
         raise e
 
+def _write_duplicates_report(output_path: str, report_path: str, metrics: PipelineMetrics):
+    """
+    Runs the fuzzy duplicate-candidate stage over the processed output. Only the columns it
+    compares are read back, so this works after streaming runs as well.
+    """
+    with metrics.stage('duplicates') as stage:
+        cleaned = read_processed(output_path, columns=DUPLICATE_COLUMNS)
+        stage.rows_in = len(cleaned)
+        report = find_duplicate_clusters(cleaned)
+        stage.rows_out = len(report)
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    report.to_csv(report_path, index=False)
+    clusters = report['cluster_id'].nunique()
+    logger.info(f"Duplicate report: {clusters} clusters covering {len(report)} employees saved to {report_path}")
+
+def _run_mode(input_path: str, output_path: str, chunk_size: Optional[int], workers: int, incremental: bool,
+              csv_export: Optional[str], db_path: Optional[str], metrics: PipelineMetrics,
+              dedup_memory_mb: float, read_workers: int, pipelined: bool, checkpoint: bool,
+              progress: Optional[Callable[[float], None]], as_of: Optional[str]):
+    """
+    Dispatches to the incremental, streaming/parallel or in-memory pipeline.
+    """
+    if incremental:
+        if chunk_size or workers > 1 or pipelined or checkpoint:
+            raise ValueError("Incremental mode cannot be combined with chunked, parallel, pipelined or checkpointed mode.")
+        return _incremental_pipeline(input_path, output_path, csv_export, db_path, metrics, as_of)
+
+    if (workers > 1 or pipelined or checkpoint) and not chunk_size:
+        chunk_size = DEFAULT_CHUNK_SIZE
+
+    if chunk_size:
+        logger.info(f"Streaming mode enabled (chunk size: {chunk_size}, workers: {workers}, pipelined: {pipelined}).")
+        _stream_pipeline(input_path, output_path, chunk_size, workers=workers,
+                         csv_export=csv_export, db_path=db_path, metrics=metrics,
+                         dedup_memory_mb=dedup_memory_mb, read_workers=read_workers, pipelined=pipelined,
+                         checkpoint=checkpoint,
+                         progress=(lambda done, total: progress(done / total if total else 1.0)) if progress else None,
+                         as_of=as_of)
+        return None
+
+    as_of = as_of or default_as_of()
+
+    with metrics.stage('load') as stage:
+        df = read_input(input_path, read_workers=read_workers)
+        stage.rows_in = len(df)
+    logger.info(f"Loaded {len(df)} rows.")
+    
+    # 1. Schema Validation (Strict Mode)
+    check_schema(df, REQUIRED_COLUMNS)
+    
+    # 2. Deduplication
+    initial_count = len(df)
+    with metrics.stage('dedup', initial_count) as stage:
+        # Normalize email for deduplication
+        df = df[~normalize_emails(df['Email']).duplicated(keep='first')]
+        stage.rows_out = len(df)
+    logger.info(f"Dropped {initial_count - len(df)} duplicate rows. New count: {len(df)}")
+    
+    # 3-4. Cleaning, Feature Engineering & Standardization
+    logger.info("Cleaning Phones/Salaries, splitting Department_Region and standardizing dates...")
+    df = transform_chunk(df, metrics, as_of)
+    
+    # 5. Serialization
+    # Save processed data to a stable location for the Agent/DB loader
+    with metrics.stage('serialize', len(df)), \
+            ProcessedWriter(output_path, csv_export, db_path, {'as_of_date': as_of}) as writer:
+        writer.write(df)
+    return df
+
 if __name__ == "__main__":
     # Default paths for standalone testing
     INPUT_FILE = "data/raw/employees.csv"
-    OUTPUT_FILE = "data/processed/cleaned_employees.csv"
-    run_pipeline(INPUT_FILE, OUTPUT_FILE)
+    OUTPUT_FILE = "data/processed/cleaned_employees.parquet"
+    DB_FILE = "data/processed/hr.db"
+
+    parser = argparse.ArgumentParser(description="Run the HR employee ETL pipeline.")
+    parser.add_argument("--input", default=INPUT_FILE,
+                        help="Raw employees CSV, or a directory/glob of .csv, .csv.gz and .csv.zst extracts.")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Cleaned output path.")
+    parser.add_argument("--csv-export", default=None,
+                        help="Also write a CSV copy of the cleaned data to this path.")
+    parser.add_argument("--db", default=DB_FILE,
+                        help="Bulk-load the cleaned rows into this SQLite database.")
+    parser.add_argument("--skip-db", action="store_true",
+                        help="Do not load the SQLite database.")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Stream the input in chunks of this many rows (bounded memory).")
+    parser.add_argument("--dedup-memory-mb", type=float, default=DEFAULT_DEDUP_MEMORY_MB,
+                        help="Memory budget for cross-chunk email dedup before spilling to disk.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Transform chunks on a pool of this many processes.")
+    parser.add_argument("--read-workers", type=int, default=DEFAULT_READ_WORKERS,
+                        help="Number of input files read concurrently.")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Overlap reading, transforming and writing through bounded queues.")
+    parser.add_argument("--duplicates-report", default=None,
+                        help="Write clusters of likely duplicate employees (fuzzy match) to this CSV.")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Record finished chunks so a failed run resumes where it stopped.")
+    parser.add_argument("--as-of", default=None,
+                        help="ISO date tenure_days is computed against (default: today).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only transform rows that changed since the last incremental run.")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Write per-stage timing/memory metrics to <output>.metrics.json.")
+    args = parser.parse_args()
+
+    run_pipeline(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+                 incremental=args.incremental, csv_export=args.csv_export,
+                 db_path=None if args.skip_db else args.db, write_metrics=args.metrics,
+                 dedup_memory_mb=args.dedup_memory_mb, read_workers=args.read_workers,
+                 pipelined=args.pipelined, duplicates_report=args.duplicates_report,
+                 checkpoint=args.checkpoint, as_of=args.as_of)
@@ -0,0 +1,230 @@
+import re
+import sqlite3
+import argparse
+from typing import Optional
+import pandas as pd
+from src.utils import setup_logging
+from src.db import DB_PATH, ADVISED_INDEX_PREFIX, ANALYZE_ROW_LIMIT, connect
+
+logger = setup_logging()
+
+# A statement shape must have been captured at least this often before an index is proposed for it
+DEFAULT_MIN_OCCURRENCES = 3
+
+# Wider covering indexes cost more to maintain than they save; beyond this only the filter/sort keys are indexed
+MAX_INDEX_COLUMNS = 6
+
+# Plan lines the advisor acts on: full table scans and sorts through a temporary B-tree
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)')
+_TEMP_BTREE = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT|RIGHT PART OF ORDER BY)')
+
+_CLAUSES = re.compile(r'\b(SELECT|FROM|WHERE|GROUP BY|HAVING|ORDER BY|LIMIT)\b', re.IGNORECASE)
+_EQUALITY_OPS = r'(?:==?|IN\b|IS\b)'
+_RANGE_OPS = r'(?:[<>]=?|BETWEEN\b|LIKE\b|GLOB\b)'
+
+def fingerprint(sql: str) -> str:
+    """
+    Statement shape with literals replaced by ?, so repeats of a question with different
+    values group together.
+    """
+    shape = re.sub(r'--[^\n]*|/\*.*?\*/', ' ', sql, flags=re.DOTALL)
+    shape = re.sub(r"'(?:[^']|'')*'", '?', shape)
+    shape = re.sub(r'\b\d+(?:\.\d+)?\b', '?', shape)
+    shape = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?)', shape)
+    return re.sub(r'\s+', ' ', shape).strip().rstrip(';').strip()
+
+def plan_issues(query_plan: str) -> list:
+    """
+    Full scans ('SCAN <table>') and temp B-tree sorts ('TEMP B-TREE: ORDER BY') in a plan.
+    """
+    issues = []
+    for line in (query_plan or "").splitlines():
+        line = line.strip()
+        scan = _FULL_SCAN.match(line)
+        if scan:
+            issues.append(f"SCAN {scan.group(1)}")
+        sort = _TEMP_BTREE.search(line)
+        if sort:
+            issues.append(f"TEMP B-TREE: {sort.group(1)}")
+    return issues
+
+def _clauses(shape: str) -> dict:
+    parts = _CLAUSES.split(shape)
+    clauses = {}
+    for keyword, body in zip(parts[1::2], parts[2::2]):
+        clauses.setdefault(keyword.upper(), body)
+    return clauses
+
+def _referenced(text: str, columns: list) -> list:
+    found = []
+    for col in columns:
+        match = re.search(rf'(?<!\w)["`\[]?{re.escape(col)}["`\]]?(?!\w)', text, re.IGNORECASE)
+        if match:
+            found.append((match.start(), col))
+    return [col for _, col in sorted(found)]
+
+def _compared(text: str, columns: list, ops: str) -> list:
+    return [col for col in _referenced(text, columns)
+            if re.search(rf'(?<!\w)["`\[]?{re.escape(col)}["`\]]?\s*(?:NOT\s+)?{ops}', text, re.IGNORECASE)]
+
+def propose_index(sql: str, columns: list) -> list:
+    """
+    Column order of an index serving a single-table statement: equality filters, then the
+    GROUP BY or ORDER BY keys, then one range filter, then the other referenced columns so
+    the index covers the query (dropped if that would exceed MAX_INDEX_COLUMNS).
+    Columns only used inside expressions cannot drive the index and only count for covering.
+    """
+    clauses = _clauses(fingerprint(sql))
+    where = clauses.get('WHERE', '')
+    equality = _compared(where, columns, _EQUALITY_OPS)
+    ranges = [col for col in _compared(where, columns, _RANGE_OPS) if col not in equality]
+    sort = _referenced(clauses.get('GROUP BY') or clauses.get('ORDER BY', ''), columns)
+
+    key = list(dict.fromkeys(equality + sort + ranges[:1]))
+    select = clauses.get('SELECT', '')
+    if re.search(r'(?<!\()\*', select):
+        # SELECT * reads the whole row anyway
+        return key
+    covering = list(dict.fromkeys(key + _referenced(" ".join(clauses.values()), columns)))
+    return covering if len(covering) <= MAX_INDEX_COLUMNS else key
+
+def _existing_indexes(conn: sqlite3.Connection, table: str) -> list:
+    indexes = []
+    for row in conn.execute(f'PRAGMA index_list("{table}")'):
+        indexes.append([info[2] for info in conn.execute(f'PRAGMA index_info("{row[1]}")')])
+    return indexes
+
+def _index_name(table: str, index_columns: list) -> str:
+    return f"{ADVISED_INDEX_PREFIX}{table}_{'_'.join(col.lower() for col in index_columns)}"
+
+def _index_ddl(table: str, index_columns: list) -> str:
+    quoted = ", ".join(f'"{col}"' for col in index_columns)
+    return f'CREATE INDEX IF NOT EXISTS {_index_name(table, index_columns)} ON "{table}" ({quoted})'
+
+def _verify(conn: sqlite3.Connection, ddl: str, sql: str, issues: list) -> bool:
+    """
+    Builds the index inside a transaction that is rolled back, and checks the plan improves.
+    """
+    conn.execute("BEGIN")
+    try:
+        conn.execute(ddl)
+        plan = "\n".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        return len(plan_issues(plan)) < len(issues)
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.execute("ROLLBACK")
+
+def recommend_indexes(db_path: str = DB_PATH, min_occurrences: int = DEFAULT_MIN_OCCURRENCES,
+                      since: Optional[str] = None, verify: bool = True) -> pd.DataFrame:
+    """
+    Mines agent_queries for statement shapes that keep hitting full scans or temp B-tree
+    sorts and proposes an index for each (see propose_index).
+
+    Shapes seen fewer than min_occurrences times (optionally only counting captures at or
+    after `since`, a SQLite datetime) are ignored, as are statements over several tables and
+    proposals an existing index already starts with. With verify, each candidate is built
+    in a rolled-back transaction and kept only if the plan loses an issue.
+
+    Returns one row per proposed index: table, index_name, columns, occurrences, shapes,
+    issues, example_sql, ddl and verified, most frequent first.
+    """
+    conn = connect(db_path, isolation_level=None)
+    try:
+        captured = pd.read_sql_query(
+            "SELECT sql, query_plan FROM agent_queries WHERE error IS NULL AND query_plan IS NOT NULL"
+            + (" AND timestamp >= ?" if since else ""), conn, params=(since,) if since else None)
+        if captured.empty:
+            return pd.DataFrame(columns=['table', 'index_name', 'columns', 'occurrences', 'shapes',
+                                         'issues', 'example_sql', 'ddl', 'verified'])
+
+        captured['issues'] = captured['query_plan'].map(plan_issues)
+        captured = captured[captured['issues'].str.len() > 0].copy()
+        captured['shape'] = captured['sql'].map(fingerprint)
+        groups = captured.groupby('shape', sort=False).agg(
+            occurrences=('sql', 'size'), example_sql=('sql', 'last'), issues=('issues', 'last'))
+        groups = groups[groups['occurrences'] >= min_occurrences]
+
+        table_columns = {}
+        proposals = {}
+        for shape, group in groups.iterrows():
+            tables = {issue.split()[1] for issue in group['issues'] if issue.startswith("SCAN ")}
+            tables |= set(re.findall(r'\bFROM\s+["`\[]?(\w+)', shape, re.IGNORECASE))
+            if len(tables) != 1 or re.search(r'\bJOIN\b', shape, re.IGNORECASE):
+                continue
+            table = tables.pop()
+            if table not in table_columns:
+                table_columns[table] = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+            index_columns = propose_index(group['example_sql'], table_columns[table])
+            if not index_columns:
+                continue
+            if any(existing[:len(index_columns)] == index_columns for existing in _existing_indexes(conn, table)):
+                continue
+
+            name = _index_name(table, index_columns)
+            proposal = proposals.setdefault(name, {
+                'table': table, 'index_name': name, 'columns': index_columns, 'occurrences': 0,
+                'shapes': 0, 'issues': [], 'example_sql': group['example_sql'],
+                'ddl': _index_ddl(table, index_columns), 'verified': None,
+            })
+            proposal['occurrences'] += int(group['occurrences'])
+            proposal['shapes'] += 1
+            proposal['issues'] = sorted(set(proposal['issues']) | set(group['issues']))
+
+        if verify:
+            for proposal in proposals.values():
+                sql = proposal['example_sql']
+                proposal['verified'] = _verify(conn, proposal['ddl'], sql,
+                                               plan_issues("\n".join(row[-1] for row in
+                                                                     conn.execute(f"EXPLAIN QUERY PLAN {sql}"))))
+            proposals = {name: p for name, p in proposals.items() if p['verified']}
+    finally:
+        conn.close()
+
+    report = pd.DataFrame(list(proposals.values()),
+                          columns=['table', 'index_name', 'columns', 'occurrences', 'shapes',
+                                   'issues', 'example_sql', 'ddl', 'verified'])
+    logger.info(f"Index advisor: {len(groups)} recurring problem shapes, {len(report)} indexes proposed.")
+    return report.sort_values('occurrences', ascending=False, kind='stable').reset_index(drop=True)
+
+def apply_indexes(report: pd.DataFrame, db_path: str = DB_PATH):
+    """
+    Creates the proposed indexes in one transaction and refreshes their statistics.
+    They are named with ADVISED_INDEX_PREFIX, so later ETL loads recreate them.
+    """
+    if report.empty:
+        return
+    conn = connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for ddl, name in zip(report['ddl'], report['index_name']):
+                conn.execute(ddl)
+                conn.execute(f"PRAGMA analysis_limit={ANALYZE_ROW_LIMIT}")
+                conn.execute(f'ANALYZE "{name}"')
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    logger.info(f"Applied {len(report)} advised indexes to {db_path}.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propose indexes from the SQL the agent actually ran.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database with the agent_queries capture.")
+    parser.add_argument("--min-occurrences", type=int, default=DEFAULT_MIN_OCCURRENCES,
+                        help="Captures of a statement shape needed before an index is proposed for it.")
+    parser.add_argument("--since", default=None, help="Only consider captures at or after this datetime.")
+    parser.add_argument("--no-verify", action="store_true", help="Skip the trial build checking each proposal.")
+    parser.add_argument("--apply", action="store_true", help="Create the proposed indexes (default: report only).")
+    args = parser.parse_args()
+
+    report = recommend_indexes(args.db, args.min_occurrences, args.since, verify=not args.no_verify)
+    if report.empty:
+        print("No recurring full scans or temp B-tree sorts to fix.")
+    else:
+        with pd.option_context('display.max_colwidth', 120, 'display.width', 200):
+            print(report[['occurrences', 'shapes', 'issues', 'ddl', 'verified']].to_string(index=False))
+        if args.apply:
+            apply_indexes(report, args.db)
@@ -0,0 +1,211 @@
+import os
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+from contextlib import closing
+from typing import BinaryIO, Callable, Optional
+from src.utils import setup_logging, check_schema
+from src.db import (DB_PATH, QUERY_LOGS_DDL, INGESTED_FILES_DDL, upsert_employees, read_etl_metadata,
+                    write_etl_metadata, current_snapshot, connection_snapshot, connect)
+from src.etl import (REQUIRED_COLUMNS, DEFAULT_CHUNK_SIZE, read_input, normalize_emails, transform_chunk,
+                     run_pipeline, default_as_of)
+from src.sources import SUPPORTED_SUFFIXES, inputs_sha256
+
+logger = setup_logging()
+
+# Seconds between directory scans
+DEFAULT_POLL_INTERVAL = 5.0
+
+# Block size used when spooling an upload to disk
+UPLOAD_COPY_BLOCK = 1 << 20
+
+# How long a micro-batch waits for readers holding the database before giving up
+BUSY_TIMEOUT_MS = 30_000
+
+class IngestDaemon:
+    """
+    Watches a raw directory and applies every new or changed extract to the live database
+    as a micro-batch: the file goes through the ETL cleaning steps and is upserted into
+    the employees table (see upsert_employees) while the app keeps querying it.
+
+    The directory is polled rather than hooked into OS notifications, so it works on any
+    filesystem. A file is only picked up once its size and mtime are unchanged across two
+    scans, so half-copied extracts are not read. Applied files are recorded by path and
+    content hash in the ingested_files table, in the same transaction as their rows, so a
+    file is applied exactly once even across restarts; a failed file is retried only after
+    it changes. Micro-batches reuse the database's recorded as_of_date, so tenure_days stays
+    comparable with the rows already loaded.
+
+    A full rebuild hot-swaps a new snapshot in (see publish_snapshot) with an empty ledger.
+    A batch that was waiting on the old snapshot is applied to the new one instead, and
+    files handled before the swap are considered again.
+    """
+
+    def __init__(self, watch_dir: str = "data/raw", db_path: str = DB_PATH,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.watch_dir = watch_dir
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        # path -> (size, mtime_ns) seen on the previous scan, and of files already handled
+        self._last_scan = {}
+        self._handled = {}
+        self._snapshot = None
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = connect(self.db_path, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute(QUERY_LOGS_DDL)
+        conn.execute(INGESTED_FILES_DDL)
+        return conn
+
+    def ready_files(self) -> list:
+        """
+        Files whose size and mtime settled since the previous scan and that have not been
+        handled in their current state, in sorted path order.
+        """
+        scan = {}
+        for entry in os.scandir(self.watch_dir):
+            if entry.is_file() and entry.name.endswith(SUPPORTED_SUFFIXES):
+                stat = entry.stat()
+                scan[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        ready = [path for path, stamp in scan.items()
+                 if self._last_scan.get(path) == stamp and self._handled.get(path) != stamp]
+        self._last_scan = scan
+        return sorted(ready)
+
+    def ingest_file(self, path: str, conn: Optional[sqlite3.Connection] = None) -> Optional[int]:
+        """
+        Cleans one extract and upserts it. Returns the number of rows upserted, or None
+        when this exact file content was applied before.
+        """
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            sha256 = inputs_sha256([path])
+            applied = conn.execute("SELECT 1 FROM ingested_files WHERE path = ? AND sha256 = ?",
+                                   (path, sha256)).fetchone()
+            if applied:
+                return None
+
+            df = read_input(path)
+            check_schema(df, REQUIRED_COLUMNS)
+            email_keys = normalize_emails(df['Email'])
+            first = ~email_keys.duplicated(keep='first')
+            metadata = read_etl_metadata(conn)
+            as_of = metadata.get('as_of_date') or default_as_of()
+            cleaned = transform_chunk(df[first], as_of=as_of)
+
+            # Rows and ledger entry commit together; readers keep seeing the old snapshot until then
+            conn.execute("BEGIN IMMEDIATE")
+            while connection_snapshot(conn) != current_snapshot(self.db_path):
+                # A rebuild was published while this batch waited for the lock; apply it there
+                conn.execute("ROLLBACK")
+                if own_conn:
+                    conn.close()
+                conn, own_conn = self._connect(), True
+                conn.execute("BEGIN IMMEDIATE")
+                metadata = read_etl_metadata(conn)
+                if metadata.get('as_of_date', as_of) != as_of:
+                    as_of = metadata['as_of_date']
+                    cleaned = transform_chunk(df[first], as_of=as_of)
+            try:
+                upserted = upsert_employees(conn, cleaned, email_keys[first])
+                if 'as_of_date' not in metadata:
+                    write_etl_metadata(conn, {'as_of_date': as_of})
+                conn.execute("INSERT INTO ingested_files (path, sha256, rows_in, rows_upserted) VALUES (?, ?, ?, ?)",
+                             (path, sha256, len(df), upserted))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            logger.info(f"Ingested {path}: {len(df)} rows read, {upserted} upserted into {self.db_path}.")
+            return upserted
+        finally:
+            if own_conn:
+                conn.close()
+
+    def poll_once(self) -> int:
+        """
+        Runs one scan and ingests every ready file. Returns the number of files applied.
+        """
+        applied = 0
+        snapshot = current_snapshot(self.db_path)
+        if self._snapshot is not None and snapshot != self._snapshot:
+            logger.info(f"Database snapshot changed to {snapshot}. Re-checking all extracts.")
+            self._handled.clear()
+        self._snapshot = snapshot
+        conn = self._connect()
+        try:
+            for path in self.ready_files():
+                stamp = self._last_scan[path]
+                try:
+                    if self.ingest_file(path, conn) is not None:
+                        applied += 1
+                except Exception as e:
+                    logger.error(f"Failed to ingest {path}: {e}. It will be retried once it changes.")
+                self._handled[path] = stamp
+        finally:
+            conn.close()
+        return applied
+
+    def run(self, max_polls: Optional[int] = None):
+        """
+        Polls the directory until interrupted (or max_polls scans have run).
+        """
+        logger.info(f"Watching {self.watch_dir} for new extracts every {self.poll_interval}s (database: {self.db_path}).")
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                self.poll_once()
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("Ingestion daemon stopped.")
+
+def ingest_upload(upload: BinaryIO, filename: str, output_path: str, db_path: str = DB_PATH,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, progress: Optional[Callable[[float], None]] = None) -> int:
+    """
+    Replaces the processed dataset and the employees table with an uploaded extract.
+
+    The upload is spooled to a temp file next to the output in fixed-size blocks and
+    streamed through run_pipeline in chunks, so memory stays bounded by chunk_size
+    whatever the file size. The new output is written under a temp name and renamed over
+    output_path only after the database load committed; the database is built as a new
+    snapshot and hot-swapped in, so queries see either the old or the new data. filename
+    decides the compression (.csv, .csv.gz, .csv.zst). progress receives 0-1 fractions.
+    Returns the number of rows loaded.
+    """
+    suffix = next((s for s in sorted(SUPPORTED_SUFFIXES, key=len, reverse=True) if filename.endswith(s)), None)
+    if suffix is None:
+        raise ValueError(f"Unsupported file type: {filename}. Expected one of {', '.join(SUPPORTED_SUFFIXES)}.")
+
+    work_dir = os.path.dirname(output_path) or '.'
+    os.makedirs(work_dir, exist_ok=True)
+    spool = tempfile.NamedTemporaryFile(dir=work_dir, prefix="upload_", suffix=suffix, delete=False)
+    staged_output = os.path.join(work_dir, f".upload_{os.getpid()}_{os.path.basename(output_path)}")
+    try:
+        with spool:
+            shutil.copyfileobj(upload, spool, UPLOAD_COPY_BLOCK)
+        run_pipeline(spool.name, staged_output, chunk_size=chunk_size, db_path=db_path, progress=progress)
+        os.replace(staged_output, output_path)
+        with closing(sqlite3.connect(db_path)) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+        logger.info(f"Uploaded extract {filename} loaded: {rows} employees.")
+        return rows
+    finally:
+        os.remove(spool.name)
+        if os.path.exists(staged_output):
+            os.remove(staged_output)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a directory and upsert new HR extracts into the database.")
+    parser.add_argument("--watch", default="data/raw", help="Directory receiving raw extracts.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database to upsert into.")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between scans.")
+    args = parser.parse_args()
+
+    IngestDaemon(args.watch, args.db, args.interval).run()
@@ -0,0 +1,179 @@
+import os
+import glob
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.utils import setup_logging
+from src.db import DB_PATH, LOG_COMPRESS_MIN_BYTES, connect, compress_response, decompress_response
+from src.checkpoint import _fsync_replace
+
+logger = setup_logging()
+
+# Days of interactions kept in the hot query_logs table
+DEFAULT_RETENTION_DAYS = 30
+
+# Root of the archive; one date=YYYY-MM-DD directory of Parquet parts per day
+ARCHIVE_DIR = "data/archive/query_logs"
+
+# Rows moved per archive transaction, bounding memory and how long log writers wait
+ARCHIVE_BATCH_ROWS = 50_000
+
+LOG_COLUMNS = ['id', 'timestamp', 'user_query', 'agent_response', 'verification_status']
+
+# Columns identifying one interaction. ids alone are not enough: databases that predate carrying
+# the id counter across reloads handed out ids again after an archive run emptied query_logs.
+LOG_KEY_COLUMNS = ['id', 'timestamp', 'user_query']
+
+def _partition_dir(archive_dir: str, day: str) -> str:
+    return os.path.join(archive_dir, f"date={day}")
+
+def _write_part(archive_dir: str, day: str, rows: pd.DataFrame):
+    """
+    Durably writes one day's rows as a zstd Parquet part named after its id range and the
+    time of writing, so a part never replaces an earlier one.
+    """
+    directory = _partition_dir(archive_dir, day)
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    name = f"part-{rows['id'].min():012d}-{rows['id'].max():012d}-{stamp}-{os.getpid()}.parquet"
+    path = os.path.join(directory, name)
+    pq.write_table(pa.Table.from_pandas(rows[LOG_COLUMNS], preserve_index=False), f"{path}.tmp", compression='zstd')
+    _fsync_replace(f"{path}.tmp", path)
+
+def archive_query_logs(db_path: str = DB_PATH, archive_dir: str = ARCHIVE_DIR,
+                       retention_days: int = DEFAULT_RETENTION_DAYS, now: Optional[datetime] = None) -> int:
+    """
+    Moves query_logs rows older than retention_days (whole UTC days) into the archive.
+
+    Rows are taken in id order in batches of ARCHIVE_BATCH_ROWS. Each batch is written
+    as one Parquet part per day, with responses decompressed (Parquet compresses the
+    column as a whole). Only after the parts are durable are the rows deleted, in one
+    short transaction. A crash in between leaves the rows in both places; readers drop
+    the duplicates (same LOG_KEY_COLUMNS). Returns the number of rows archived.
+    """
+    cutoff_day = ((now or datetime.now(timezone.utc)).date() - timedelta(days=retention_days)).isoformat()
+    archived = 0
+    conn = connect(db_path, isolation_level=None)
+    try:
+        while True:
+            rows = pd.read_sql_query(
+                f"SELECT {', '.join(LOG_COLUMNS)} FROM query_logs WHERE timestamp < ? ORDER BY id LIMIT ?",
+                conn, params=(cutoff_day, ARCHIVE_BATCH_ROWS), dtype={'agent_response': object})
+            if rows.empty:
+                break
+            rows['agent_response'] = rows['agent_response'].map(decompress_response)
+            for day, part in rows.groupby(rows['timestamp'].str[:10], sort=True):
+                _write_part(archive_dir, day, part)
+
+            # New rows always get larger ids, so this deletes exactly the archived batch
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM query_logs WHERE timestamp < ? AND id <= ?",
+                             (cutoff_day, int(rows['id'].max())))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            archived += len(rows)
+    finally:
+        conn.close()
+    logger.info(f"Archived {archived} query_logs rows older than {cutoff_day} to {archive_dir}.")
+    return archived
+
+def compress_hot_responses(db_path: str = DB_PATH, batch_rows: int = 1000) -> int:
+    """
+    Compresses large agent_response values stored before compression was enabled.
+    Returns the number of rows rewritten.
+    """
+    compressed = 0
+    conn = connect(db_path, isolation_level=None)
+    try:
+        while True:
+            rows = conn.execute(
+                "SELECT id, agent_response FROM query_logs WHERE typeof(agent_response) = 'text' "
+                "AND length(CAST(agent_response AS BLOB)) >= ? LIMIT ?",
+                (LOG_COMPRESS_MIN_BYTES, batch_rows)).fetchall()
+            if not rows:
+                break
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("UPDATE query_logs SET agent_response = ? WHERE id = ?",
+                             [(compress_response(response), row_id) for row_id, response in rows])
+            conn.execute("COMMIT")
+            compressed += len(rows)
+    finally:
+        conn.close()
+    if compressed:
+        logger.info(f"Compressed {compressed} large responses in query_logs.")
+    return compressed
+
+def archived_days(archive_dir: str = ARCHIVE_DIR) -> list:
+    """
+    ISO dates that have an archive partition, in order.
+    """
+    return sorted(os.path.basename(path)[len("date="):] for path in glob.glob(_partition_dir(archive_dir, "*")))
+
+def iter_archived_logs(start: Optional[str] = None, end: Optional[str] = None, archive_dir: str = ARCHIVE_DIR,
+                       columns: Optional[list] = None):
+    """
+    Yields the archived interactions one day at a time, for days from start to end
+    (inclusive ISO dates, both optional), ordered by id. Memory stays bounded by one day.
+    """
+    read_columns = None if columns is None else list(dict.fromkeys(LOG_KEY_COLUMNS + columns))
+    for day in archived_days(archive_dir):
+        if (start and day < start) or (end and day > end):
+            continue
+        parts = sorted(glob.glob(os.path.join(_partition_dir(archive_dir, day), "part-*.parquet")))
+        if not parts:
+            continue
+        frame = pd.concat([pq.read_table(path, columns=read_columns).to_pandas() for path in parts], ignore_index=True)
+        frame = frame.drop_duplicates(LOG_KEY_COLUMNS).sort_values(['id', 'timestamp'], kind='stable').reset_index(drop=True)
+        yield frame if columns is None else frame[columns]
+
+def read_query_logs(start: Optional[str] = None, end: Optional[str] = None, db_path: str = DB_PATH,
+                    archive_dir: str = ARCHIVE_DIR, include_hot: bool = True) -> pd.DataFrame:
+    """
+    Every logged interaction from start to end (inclusive ISO dates, both optional),
+    archived and still in query_logs, with responses as plain text and ordered by id.
+    This is the input of the training export.
+    """
+    frames = list(iter_archived_logs(start, end, archive_dir))
+    if include_hot and os.path.exists(db_path):
+        conn = connect(db_path)
+        try:
+            hot = pd.read_sql_query(
+                f"SELECT {', '.join(LOG_COLUMNS)} FROM query_logs "
+                "WHERE (:start IS NULL OR timestamp >= :start) AND (:end IS NULL OR timestamp < date(:end, '+1 day'))",
+                conn, params={'start': start, 'end': end}, dtype={'agent_response': object})
+        finally:
+            conn.close()
+        hot['agent_response'] = hot['agent_response'].map(decompress_response)
+        frames.append(hot)
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=LOG_COLUMNS)
+    logs = pd.concat(frames, ignore_index=True)
+    logs = logs.drop_duplicates(LOG_KEY_COLUMNS, keep='last')
+    return logs.sort_values(['id', 'timestamp'], kind='stable').reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old query_logs rows and compress large responses.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database holding query_logs.")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="Root of the date-partitioned archive.")
+    parser.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS,
+                        help="Days of interactions kept in the database.")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Rebuild the database file afterwards to give the freed space back to the filesystem.")
+    args = parser.parse_args()
+
+    archive_query_logs(args.db, args.archive_dir, args.retention_days)
+    compress_hot_responses(args.db)
+    if args.vacuum:
+        conn = connect(args.db, isolation_level=None)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
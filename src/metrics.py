@@ -0,0 +1,111 @@
+import json
+import resource
+import time
+from contextlib import contextmanager, nullcontext
+
+
+def _peak_rss_mb() -> float:
+    """
+    Process high-water mark RSS. ru_maxrss is reported in KiB on Linux.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageRecord:
+    """
+    Measurements of a single stage execution. rows_out defaults to rows_in and can be
+    updated inside the stage (e.g. after dedup).
+    """
+    __slots__ = ('name', 'rows_in', 'rows_out', 'wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'peak_rss_growth_mb')
+
+    def __init__(self, name: str, rows_in: int = 0):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.peak_rss_growth_mb = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'stage': self.name,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_in if self.rows_out is None else self.rows_out,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'peak_rss_growth_mb': round(self.peak_rss_growth_mb, 1),
+        }
+
+
+# Shared sink for disabled metrics; attribute writes on it are simply discarded
+_DISCARDED = StageRecord('disabled')
+
+
+class PipelineMetrics:
+    """
+    Collects per-stage wall time, CPU time, row counts and memory for an ETL run.
+
+    Stages with the same name (e.g. one per chunk) are aggregated: times and row counts
+    are summed, memory figures take the maximum. Memory is tracked through the process
+    peak RSS: peak_rss_mb is the high-water mark when the stage ended and
+    peak_rss_growth_mb how much the stage raised it. A disabled instance hands out a
+    shared no-op context, so instrumented code costs nothing when metrics are off.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stages = {}
+
+    def stage(self, name: str, rows_in: int = 0):
+        if not self.enabled:
+            return nullcontext(_DISCARDED)
+        return self._measure(name, rows_in)
+
+    @contextmanager
+    def _measure(self, name: str, rows_in: int):
+        record = StageRecord(name, rows_in)
+        peak_before = _peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - wall_start
+            record.cpu_seconds = time.process_time() - cpu_start
+            record.peak_rss_mb = _peak_rss_mb()
+            record.peak_rss_growth_mb = record.peak_rss_mb - peak_before
+            self.merge([record.to_dict()])
+
+    def merge(self, stages: list):
+        """
+        Folds stage dicts (e.g. returned from worker processes) into this run.
+        """
+        for stage in stages:
+            total = self._stages.get(stage['stage'])
+            if total is None:
+                self._stages[stage['stage']] = dict(stage)
+                continue
+            for key in ('rows_in', 'rows_out', 'wall_seconds', 'cpu_seconds'):
+                total[key] = round(total[key] + stage[key], 4)
+            for key in ('peak_rss_mb', 'peak_rss_growth_mb'):
+                total[key] = max(total[key], stage[key])
+
+    @property
+    def stages(self) -> list:
+        return list(self._stages.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'stages': self.stages,
+            'peak_rss_mb': round(_peak_rss_mb(), 1),
+        }
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# Default for callers that do not collect metrics
+NULL_METRICS = PipelineMetrics(enabled=False)
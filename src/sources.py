@@ -0,0 +1,177 @@
+import os
+import glob
+import queue
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+import pandas as pd
+from src.utils import setup_logging, check_schema
+
+logger = setup_logging()
+
+# Raw extract layouts picked up from a directory; compression is inferred from the suffix
+SUPPORTED_SUFFIXES = ('.csv', '.csv.gz', '.csv.zst')
+
+# Readers open files themselves (to report byte progress), so the codec is picked from the suffix
+COMPRESSION_BY_SUFFIX = {'.gz': 'gzip', '.zst': 'zstd', '.bz2': 'bz2', '.xz': 'xz'}
+
+# Files read concurrently by default
+DEFAULT_READ_WORKERS = 4
+
+# Chunks each file reader may buffer ahead of the consumer
+DEFAULT_PREFETCH_CHUNKS = 2
+
+# Queue sentinel marking the end of a file
+_END = object()
+
+def resolve_inputs(input_path: str) -> list:
+    """
+    Expands an input spec into the ordered list of raw extract files.
+    input_path may be a single file, a directory (every supported file in it) or a glob
+    pattern. Files are always ordered by their full path, so cross-file dedup is stable:
+    rows are considered file by file in that order and, within a file, in row order;
+    the first occurrence of an email wins.
+    Raises FileNotFoundError when nothing matches.
+    """
+    if os.path.isdir(input_path):
+        paths = [os.path.join(input_path, name) for name in os.listdir(input_path)
+                 if name.endswith(SUPPORTED_SUFFIXES)]
+    elif glob.has_magic(input_path):
+        paths = [path for path in glob.glob(input_path) if os.path.isfile(path)]
+    else:
+        paths = [input_path] if os.path.isfile(input_path) else []
+
+    if not paths:
+        raise FileNotFoundError(f"Input file {input_path} does not exist.")
+    return sorted(paths)
+
+def inputs_sha256(paths: list) -> str:
+    """
+    Combined content hash of the input files, in order. Files are hashed as stored
+    (compressed bytes), in 1 MiB blocks so large extracts are never fully loaded.
+    """
+    combined = hashlib.sha256()
+    for path in paths:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        combined.update(f"{os.path.basename(path)}:{digest.hexdigest()}\n".encode())
+    return combined.hexdigest()
+
+def _union_categoricals(df: pd.DataFrame, dtype: dict) -> pd.DataFrame:
+    # Concatenating categoricals with different categories degrades them to object
+    for col, col_dtype in (dtype or {}).items():
+        if col_dtype == 'category' and col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def read_frames(paths: list, dtype: Optional[dict] = None, read_workers: int = DEFAULT_READ_WORKERS) -> pd.DataFrame:
+    """
+    Reads every file into one frame, several files at a time on a thread pool
+    (parsing and decompression release the GIL). Rows keep resolve_inputs order.
+    As in streaming mode, every file must carry the columns of the first one (ValueError
+    otherwise); its columns are aligned to that order and extra ones are dropped.
+    """
+    if len(paths) == 1:
+        return pd.read_csv(paths[0], dtype=dtype)
+    with ThreadPoolExecutor(max_workers=max(1, read_workers)) as pool:
+        frames = list(pool.map(lambda path: pd.read_csv(path, dtype=dtype), paths))
+    columns = list(frames[0].columns)
+    for i, (path, frame) in enumerate(zip(paths, frames)):
+        if list(frame.columns) != columns:
+            try:
+                check_schema(frame, columns)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from None
+            frames[i] = frame[columns]
+    return _union_categoricals(pd.concat(frames, ignore_index=True), dtype)
+
+class _FileReader(threading.Thread):
+    """
+    Background reader that parses one file chunk by chunk into a bounded queue.
+    Each chunk is queued with the file offset reached after parsing it (compressed bytes
+    for compressed files; approximate, since the parser reads ahead in blocks).
+    Errors are forwarded through the queue; a set stop event makes it give up.
+    """
+
+    def __init__(self, path: str, chunksize: int, dtype: Optional[dict], prefetch: int, stop: threading.Event):
+        super().__init__(name=f"reader-{os.path.basename(path)}", daemon=True)
+        self.path = path
+        self.chunksize = chunksize
+        self.dtype = dtype
+        self.chunks = queue.Queue(maxsize=max(1, prefetch))
+        self._stop_event = stop
+
+    def _put(self, item) -> bool:
+        while not self._stop_event.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        try:
+            compression = COMPRESSION_BY_SUFFIX.get(os.path.splitext(self.path)[1])
+            with open(self.path, 'rb') as f, pd.read_csv(f, dtype=self.dtype, chunksize=self.chunksize,
+                                                         compression=compression) as reader:
+                for chunk in reader:
+                    if not self._put((chunk, f.tell())):
+                        return
+            self._put(_END)
+        except BaseException as e:
+            self._put(e)
+
+def iter_chunks(paths: list, chunksize: int, dtype: Optional[dict] = None,
+                read_workers: int = DEFAULT_READ_WORKERS, prefetch: int = DEFAULT_PREFETCH_CHUNKS,
+                progress: Optional[Callable[[int, int], None]] = None):
+    """
+    Yields (path, chunk) for every chunk of every file, in resolve_inputs order.
+
+    Up to read_workers files are parsed ahead on background threads, each buffering at
+    most prefetch chunks, so reading and decompression overlap with whatever the
+    consumer does with a chunk while memory stays bounded by
+    read_workers * prefetch * chunksize rows. A reader error is raised here, in the
+    consumer; closing the generator early stops the readers.
+
+    progress, if given, is called from the consumer's thread before each chunk is yielded
+    with (bytes_read, total_bytes) over all files, so it can drive a progress bar.
+    """
+    stop = threading.Event()
+    remaining = iter(paths)
+    readers = deque()
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    finished_bytes = 0
+
+    def start_next():
+        path = next(remaining, None)
+        if path is not None:
+            reader = _FileReader(path, chunksize, dtype, prefetch, stop)
+            reader.start()
+            readers.append(reader)
+
+    try:
+        for _ in range(max(1, read_workers)):
+            start_next()
+        while readers:
+            reader = readers[0]
+            item = reader.chunks.get()
+            if item is _END:
+                readers.popleft()
+                finished_bytes += os.path.getsize(reader.path)
+                start_next()
+                continue
+            if isinstance(item, BaseException):
+                raise item
+            chunk, offset = item
+            if progress is not None:
+                progress(finished_bytes + offset, total_bytes)
+            yield reader.path, chunk
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
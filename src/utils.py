@@ -1,5 +1,6 @@
 import logging
 import re
+import numpy as np
 import pandas as pd
 import sys
 
@@ -34,19 +35,138 @@ def format_phone_number(raw_phone):
     
     return None
 
+def format_phone_series(raw_phones: pd.Series) -> pd.Series:
+    """
+    Vectorized equivalent of format_phone_number for a whole column.
+    Produces identical (XXX) XXX-XXXX / None output without a Python call per row.
+    """
+    if pd.api.types.is_integer_dtype(raw_phones.dtype):
+        # Integer columns only ever carry an optional minus sign, so skip the regex pass
+        digits = raw_phones.abs().astype(str)
+    else:
+        digits = raw_phones.astype(str).str.replace(r'\D', '', regex=True)
+
+    valid = raw_phones.notna() & (digits.str.len() == 10)
+    formatted = digits.str.replace(r'^(\d{3})(\d{3})(\d{4})$', r'(\1) \2-\3', regex=True)
+
+    return formatted.astype(object).where(valid, None)
+
+# Currency symbols and thousands separators found in raw salary feeds (e.g. "$85,000.50")
+SALARY_NOISE_PATTERN = r'[$€£¥,\s]'
+
 def clean_salary(raw_salary):
     """
     Converts salary input to integer, handling string formatting and NaN values.
     Returns pd.NA for invalid inputs.
     """
     try:
+        if isinstance(raw_salary, str):
+            raw_salary = re.sub(SALARY_NOISE_PATTERN, '', raw_salary)
         val = pd.to_numeric(raw_salary, errors='coerce')
         if pd.isna(val):
             return pd.NA
         return int(round(val))
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, OverflowError):
         return pd.NA
 
+def clean_salary_series(raw_salaries: pd.Series) -> pd.Series:
+    """
+    Vectorized equivalent of clean_salary for a whole column.
+    Strips currency noise, coerces, rounds half-to-even and casts to Int64 in one pass.
+    """
+    if pd.api.types.is_numeric_dtype(raw_salaries.dtype) and not pd.api.types.is_bool_dtype(raw_salaries.dtype):
+        values = pd.to_numeric(raw_salaries, errors='coerce')
+    else:
+        stripped = raw_salaries.astype(str).str.replace(SALARY_NOISE_PATTERN, '', regex=True)
+        values = pd.to_numeric(stripped, errors='coerce').where(raw_salaries.notna())
+
+    values = values.astype('float64')
+    values = values.where(np.isfinite(values))
+    return values.round().astype('Int64')
+
+# Join_Date layouts seen in upstream HR feeds, in tie-break priority order
+DATE_FORMAT_CANDIDATES = [
+    '%m/%d/%Y', '%Y-%m-%d', '%m-%d-%Y', '%Y/%m/%d',
+    '%d/%m/%Y', '%d.%m.%Y', '%m/%d/%y', '%d-%b-%Y', '%b %d, %Y',
+]
+
+# Formats that read the same text differently. When a column matches both, a format is only used
+# if the sample holds values only it can parse (e.g. '25/12/2020' for day-first); the dominant one
+# reads the ambiguous values. Without such evidence either way, the first (US month-first) wins.
+CONFLICTING_DATE_FORMATS = [('%m/%d/%Y', '%d/%m/%Y')]
+
+def detect_date_formats(raw_dates: pd.Series, sample_size: int = 1000) -> list:
+    """
+    Returns the candidate formats that match the column, judged on a sample of its distinct
+    values and ordered by how many sampled values they parse (dominant format first).
+    Of each CONFLICTING_DATE_FORMATS pair only the formats with evidence in the sample are
+    kept, the one with more evidence first.
+    """
+    sample = pd.Series(raw_dates.dropna().unique())
+    sample = sample.sample(min(sample_size, len(sample)), random_state=0) if len(sample) else sample
+    matches = {}
+    for fmt in DATE_FORMAT_CANDIDATES:
+        matched = pd.to_datetime(sample, format=fmt, errors='coerce').notna().to_numpy()
+        if matched.any():
+            matches[fmt] = matched
+
+    hits = {fmt: int(matched.sum()) for fmt, matched in matches.items()}
+    for first, second in CONFLICTING_DATE_FORMATS:
+        if first not in matches or second not in matches:
+            continue
+        # Values each format parses and the other cannot
+        evidence = {first: int((matches[first] & ~matches[second]).sum()),
+                    second: int((matches[second] & ~matches[first]).sum())}
+        dominant = second if evidence[second] > evidence[first] else first
+        other = first if dominant == second else second
+        if evidence[other]:
+            # Only reads the values the dominant format cannot
+            hits[other] = min(evidence[other], hits[dominant] - 1)
+        else:
+            del hits[other]
+    return sorted(hits, key=lambda fmt: (-hits[fmt], DATE_FORMAT_CANDIDATES.index(fmt)))
+
+def standardize_dates(raw_dates: pd.Series, sample_size: int = 1000):
+    """
+    Converts a date column to ISO 8601 (YYYY-MM-DD) strings.
+    Formats detected from a sample (see detect_date_formats) are each parsed in one
+    vectorized pass. Only those formats are used: values matching none of them become NaN
+    and are counted, rather than guessed at.
+    Join dates repeat heavily, so parsing runs over the distinct values and is broadcast back.
+    Returns (iso_dates, format_counts) where format_counts maps each format (plus
+    'unparsed') to the number of rows it handled.
+    """
+    if pd.api.types.is_datetime64_any_dtype(raw_dates.dtype):
+        return raw_dates.dt.strftime('%Y-%m-%d'), {'datetime': int(raw_dates.notna().sum())}
+
+    codes, uniques = pd.factorize(raw_dates)
+    uniques = pd.Series(uniques, dtype=object)
+    rows_per_value = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    remaining = np.ones(len(uniques), dtype=bool)
+    format_counts = {}
+
+    for fmt in detect_date_formats(raw_dates, sample_size):
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(uniques[remaining], format=fmt, errors='coerce')
+        matched = attempt.notna().to_numpy()
+        if not matched.any():
+            continue
+        positions = np.flatnonzero(remaining)[matched]
+        parsed.iloc[positions] = attempt.to_numpy()[matched]
+        remaining[positions] = False
+        format_counts[fmt] = int(rows_per_value[positions].sum())
+
+    if remaining.any():
+        format_counts['unparsed'] = int(rows_per_value[remaining].sum())
+
+    # Code -1 (missing input) picks the trailing NaN
+    iso_uniques = parsed.dt.strftime('%Y-%m-%d')
+    iso_values = np.append(iso_uniques.to_numpy(dtype=object), np.nan)
+    return pd.Series(iso_values[codes], index=raw_dates.index, dtype=iso_uniques.dtype), format_counts
+
 def check_schema(df: pd.DataFrame, required_columns: list) -> bool:
     """
     Verifies that the DataFrame contains all required columns.
@@ -56,3 +176,25 @@ def check_schema(df: pd.DataFrame, required_columns: list) -> bool:
     if missing_cols:
         raise ValueError(f"Missing required columns: {missing_cols}")
     return True
+
+# Categorical columns of the cleaned dataset
+CATEGORICAL_COLUMNS = ['Status', 'Performance_Score', 'Department', 'Region']
+
+# dtypes the ETL produces; used to restore them when re-reading the CSV export
+PROCESSED_DTYPES = {
+    'Employee_ID': str,
+    'Age': 'Int16',
+    'Salary': 'Int64',
+    'Remote_Work': 'boolean',
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+}
+
+def read_processed(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Loads the cleaned dataset written by the ETL pipeline, optionally only some columns.
+    Parquet files are memory-mapped and keep their stored dtypes; CSV is re-parsed
+    with the pipeline's declared dtypes.
+    """
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+    return pd.read_csv(path, dtype=PROCESSED_DTYPES, usecols=columns)
@@ -1,24 +1,28 @@
 import pandas as pd
 import os
+from src.utils import read_processed
 
 print(">>> FINAL DATA VERIFICATION <<<")
-file_path = "data/processed/cleaned_employees.csv"
+file_path = "data/processed/cleaned_employees.parquet"
+if not os.path.exists(file_path):
+    # Fall back to the optional CSV export
+    file_path = "data/processed/cleaned_employees.csv"
 
 # 1. Load Data
 if not os.path.exists(file_path):
     print("❌ Error: File not found.")
     exit(1)
 
-df = pd.read_csv(file_path)
+df = read_processed(file_path)
 print(f"Loaded {len(df)} rows.")
 
 # 2. Check Date Format
 sample = df['Join_Date'].dropna().iloc[0]
 print(f"Sample Date on Disk: {sample}")
-if "-" not in str(sample) or split_sample := str(sample).split("-")[0]:
-    if len(split_sample) != 4:
-         print(f"❌ Date format incorrect. Expected YYYY-..., got {sample}")
-         # exit(1) # checking strictly
+split_sample = str(sample).split("-")[0]
+if "-" not in str(sample) or len(split_sample) != 4:
+    print(f"❌ Date format incorrect. Expected YYYY-..., got {sample}")
+    # exit(1) # checking strictly
 
 # 3. Check Tenure Logic (Earliest Date)
 # Create a small subset to test sorting